@@ -1,125 +1,525 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from utils import transcribe_audio, summarize_and_extract_action_items, create_trello_task
+from utils import (
+    transcribe_audio,
+    summarize_and_extract_action_items,
+    create_trello_tasks,
+    transcript_cache,
+    llm_cache,
+    whisper,
+    warm_up_decode_profiles,
+)
+from audio_ingest import decode_audio, AudioDecodeError, SAMPLE_RATE
+from jobs import JobCancelled, JobEvents, JobQueue, JobStore, QueueFull, QUEUED, SUCCEEDED, FAILED, CANCELLED
+from telemetry import SamplingProfiler, request_context, render_metrics, span, JOBS
+from meeting_store import MeetingStore
+from whisper_runtime import DECODE_PROFILES, faster_decode_profile, get_decode_profile
+import hmac
 import os
-import time
+import json
+import threading
+import uuid
 import logging
-from moviepy.editor import VideoFileClip  # Import moviepy for video handling
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+# Routes live on a blueprint; create_app() builds the Flask app around them. There is
+# no module-level app, so `flask --app app run` and WSGI servers call the factory.
+api = Blueprint("api", __name__)
 
-def extract_audio_from_video(video_file_path, audio_file_path):
+# Sampling profiles of single jobs (requested with profile=true) are written here
+PROFILE_DIR = os.getenv("PROFILE_DIR", "temp/profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+
+# Load and warm up Whisper in the background at startup; 0 defers loading to the first transcription
+WHISPER_WARMUP = os.getenv("WHISPER_WARMUP", "1") != "0"
+
+# Jobs drop to a faster decode profile by one step for every this many pending
+# jobs (queued + running) when they start; 0 turns the fallback off
+DECODE_FALLBACK_QUEUE_DEPTH = int(os.getenv("DECODE_FALLBACK_QUEUE_DEPTH", "3"))
+
+@api.before_app_request
+def assign_request_id():
+    # Callers may pass their own id to correlate logs across services
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+@api.after_app_request
+def add_request_id_header(response):
+    if "request_id" in g:
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+@api.route("/")
+def home():
+    return jsonify({"message": "Flask backend is running!"})
+
+@api.route("/ready")
+def ready():
+    """
+    Readiness, separate from liveness on "/": 200 once Whisper is loaded and warmed up.
+    With WHISPER_WARMUP=0 the model loads on the first transcription, so the server
+    is ready straight away.
+    """
+    if whisper.warm:
+        return jsonify({"ready": True})
+    if not WHISPER_WARMUP:
+        return jsonify({"ready": True, "loaded": whisper.loaded, "warm_up": False})
+    return jsonify({"ready": False, "loaded": whisper.loaded, "error": whisper.error}), 503
+
+def choose_decode_profile(requested):
+    """
+    The decode profile a starting job should use: the requested one (or the default),
+    stepped down to faster profiles while the job queue is deep.
+    """
+    name = get_decode_profile(requested)[0]
+    if DECODE_FALLBACK_QUEUE_DEPTH <= 0:
+        return name
+    depth = job_queue.depth()
+    fallback = faster_decode_profile(name, depth // DECODE_FALLBACK_QUEUE_DEPTH)
+    if fallback != name:
+        logger.info(f"Job queue at {depth} jobs, decoding with '{fallback}' instead of '{name}'")
+    return fallback
+
+def start_fallback_warm_up():
+    """
+    Warm up the models jobs fall back to on a background thread. Fallback happens when
+    the queue is deep, the worst time for a job to load (or download) a model itself.
+    """
+    # Every profile but the most accurate one is some profile's fallback
+    names = list(DECODE_PROFILES)[:-1]
+
+    def run():
+        try:
+            warm_up_decode_profiles(names)
+        except Exception as e:
+            logger.error(f"Fallback decode profile warm-up failed: {str(e)}")
+
+    threading.Thread(target=run, name="fallback-warm-up", daemon=True).start()
+
+def run_pipeline(ctx, audio, filename, selected_model, custom_prompt, bypass_cache=False, request_id=None,
+                 profile=False, decode_profile=None):
     """
-    Extract audio from a video file and save it as a WAV file.
+    Run the full pipeline for one upload as a background job:
+    transcription, summarization and Trello task creation.
+    `audio` is the upload already decoded to 16 kHz mono PCM, or for large uploads
+    the path of the spooled upload, which is streamed and removed afterwards.
+    With `bypass_cache`, the summary is regenerated instead of served from the LLM response cache.
+    `decode_profile` is the requested transcription profile; a deep queue may make it faster.
+    Stage timings are logged and exported under `request_id`; with `profile`, the job
+    thread is sampled and the result names the collapsed-stack profile it wrote.
     """
     try:
-        # Load the video file
-        video_clip = VideoFileClip(video_file_path)
-        
-        # Extract audio and save as WAV
-        audio_clip = video_clip.audio
-        audio_clip.write_audiofile(audio_file_path, fps=16000)  # Set sample rate to 16000 Hz
-        
-        # Close the clips to free up resources
-        audio_clip.close()
-        video_clip.close()
-        
-        logger.info(f"Extracted audio from video and saved to {audio_file_path}")
-        return True
+        with request_context(request_id or ctx.job_id):
+            args = (ctx, audio, filename, selected_model, custom_prompt, bypass_cache, decode_profile)
+            if not profile:
+                result = _run_pipeline(*args)
+            else:
+                with SamplingProfiler(interval=PROFILE_INTERVAL) as profiler:
+                    result = _run_pipeline(*args)
+                result["profile"] = profiler.write(os.path.join(PROFILE_DIR, f"{request_id or ctx.job_id}.folded"))
+                logger.info(f"Wrote profile {result['profile']}")
+        JOBS.inc(status=SUCCEEDED)
+        return result
+    except JobCancelled:
+        JOBS.inc(status=CANCELLED)
+        raise
+    except Exception:
+        JOBS.inc(status=FAILED)
+        raise
+    finally:
+        if isinstance(audio, str):
+            try:
+                os.remove(audio)
+                logger.info(f"Removed spooled upload {audio}")
+            except Exception as e:
+                logger.warning(f"Could not remove spooled upload: {str(e)}")
+
+def _run_pipeline(ctx, audio, filename, selected_model, custom_prompt, bypass_cache, decode_profile):
+    ctx.set_stage("transcribing", 0.05)
+    requested_profile = used_profile = get_decode_profile(decode_profile)[0]
+    logger.info(f"Starting transcription of {filename} with the '{requested_profile}' decode profile")
+
+    # Only consulted on a transcript cache miss: a cached transcript is used whatever the queue
+    def choose_profile(name):
+        nonlocal used_profile
+        used_profile = choose_decode_profile(name)
+        return used_profile
+
+    # Transcription accounts for most of the job, from 5% to 80%
+    def on_chunk(index, total, text):
+        ctx.check_cancelled()  # Stop mid-transcription rather than at the next stage
+        ctx.set_progress(0.05 + 0.75 * (index + 1) / total)
+        ctx.emit("transcript", {"index": index, "total": total, "text": text})
+
+    with span("transcribe", filename=filename) as fields:
+        transcript, segments = transcribe_audio(
+            audio, on_chunk=on_chunk, return_segments=True,
+            decode_profile=requested_profile, choose_profile=choose_profile,
+        )
+        fields["decode_profile"] = used_profile
+
+    if not transcript:
+        raise RuntimeError("Failed to transcribe audio")
+
+    logger.info(f"Transcription complete. Length: {len(transcript)} characters")
+    ctx.set_stage("summarizing", 0.8)
+    logger.info(f"Starting summary generation using model: {selected_model}")
+
+    use_openai = selected_model == "openai"  # Convert to boolean
+    with span("summarize", model=selected_model):
+        summary_data = summarize_and_extract_action_items(
+            transcript, use_openai=use_openai, custom_prompt=custom_prompt, use_cache=not bypass_cache
+        )
+
+    ctx.emit("summary", summary_data)
+    action_items = summary_data.get("action_items", [])
+
+    # Keep the meeting searchable; a failure here shouldn't fail the job
+    try:
+        with span("store_meeting", segments=len(segments)):
+            meeting_store.save(
+                ctx.job_id, transcript, segments, summary=summary_data.get("summary", ""),
+                action_items=action_items, filename=filename, model=selected_model,
+            )
     except Exception as e:
-        logger.error(f"Error extracting audio from video: {str(e)}")
-        return False
+        logger.error(f"Failed to store meeting {ctx.job_id}: {str(e)}")
 
-@app.route("/")
-def home():
-    return jsonify({"message": "Flask backend is running!"})
+    # Only create Trello tasks if we have action items and Trello API keys are set
+    trello_responses = []
+    if action_items and os.getenv("TRELLO_API_KEY") and os.getenv("TRELLO_TOKEN"):
+        ctx.set_stage("creating_trello_tasks", 0.95)
+        valid_items = []
+        for item in action_items:
+            if isinstance(item, dict) and all(key in item for key in ["task", "assignee", "deadline"]):  # Validate action item format
+                valid_items.append(item)
+            else:
+                logger.warning(f"Invalid action item format: {item}")
+        logger.info(f"Creating {len(valid_items)} Trello tasks")
+        with span("trello", cards=len(valid_items)):
+            trello_responses = create_trello_tasks(valid_items)
+        ctx.emit("trello", trello_responses)
+
+    return {
+        "transcript": transcript,
+        "summary_data": summary_data,
+        "trello_responses": trello_responses,
+        "decode_profile": {"requested": requested_profile, "used": used_profile},
+    }
+
+# Processed meetings, kept for search and retrieval, and the background job queue for
+# /process_audio. They are set up by create_app(), not at import: spawned transcription
+# workers re-import this module, and must neither touch the job store nor start job threads.
+meeting_store = None
+job_store = None
+job_events = None
+job_queue = None
+
+def create_app():
+    """
+    Build the Flask app. The first call in a process also opens the meeting and job
+    stores, fails jobs interrupted by the previous run and starts the job workers
+    (sized by JOB_WORKERS and JOB_QUEUE_DEPTH).
+    """
+    global meeting_store, job_store, job_events, job_queue
+    app = Flask(__name__)
+    CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+    app.register_blueprint(api)
+    if job_queue is not None:
+        return app
+    meeting_store = MeetingStore(os.getenv("MEETINGS_DB_PATH", "temp/meetings.db"))
+    job_store = JobStore(os.getenv("JOBS_DB_PATH", "temp/jobs.db"))
+    interrupted = job_store.fail_interrupted()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} jobs interrupted by the last shutdown as failed")
+    job_events = JobEvents()
+    job_queue = JobQueue(
+        job_store,
+        run_pipeline,
+        max_workers=int(os.getenv("JOB_WORKERS", "1")),
+        max_queue_depth=int(os.getenv("JOB_QUEUE_DEPTH", "10")),
+        events=job_events,
+    )
+    return app
+
+# Uploads above this size are streamed from disk by the job instead of decoded up front
+STREAMING_UPLOAD_BYTES = int(os.getenv("STREAMING_UPLOAD_MB", "20")) * 1024 * 1024
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "temp/uploads")
+
+def job_status(job):
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
 
-@app.route("/process_audio", methods=["POST"])
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_job_events(job_id, first_event=None):
+    """
+    Server-Sent Events response relaying a job's events as it runs: "stage",
+    "transcript" (one per decoded chunk), "summary" and "trello", then a final
+    "result", "error" or "cancelled" event.
+    """
+    def generate():
+        if first_event:
+            yield sse_event(*first_event)
+        for item in job_events.subscribe(job_id):
+            if item is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield sse_event(*item)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def wants_event_stream():
+    return (
+        request.args.get("stream", request.form.get("stream", "")).lower() in ("1", "true")
+        or "text/event-stream" in request.headers.get("Accept", "")
+    )
+
+@api.route("/process_audio", methods=["POST"])
 def process_audio():
+    """
+    Accept an upload and queue it for processing.
+    Returns a job id right away; poll /jobs/<id> and fetch /jobs/<id>/result, or
+    follow /jobs/<id>/events. With stream=true (or Accept: text/event-stream) the
+    response is that event stream itself, starting with a "job" event.
+    """
     try:
         file = request.files.get("audio")
         selected_model = request.form.get("model", "openai")  # Get model choice
         custom_prompt = request.form.get("customPrompt", "")  # Get custom prompt
-        
+        bypass_cache = request.form.get("bypassCache", "").lower() in ("1", "true")  # Regenerate the summary
+        decode_profile = request.form.get("decodeProfile", "").strip().lower() or None  # Transcription speed/quality
+        # Sampling profiler for this one job; admin only, as profiles expose code paths
+        profile = request.form.get("profile", "").lower() in ("1", "true") and admin_authorized()
+
         if not file:
             logger.error("No file provided")
             return jsonify({"error": "No file provided"}), 400
 
-        # Create temp directory if it doesn't exist
-        os.makedirs("temp", exist_ok=True)
-        
-        # Use timestamp to avoid filename conflicts
-        timestamp = int(time.time())
-        filepath = f"temp/file_{timestamp}"
-        audio_file_path = f"temp/audio_{timestamp}.wav"
-        
-        try:
-            # Save the uploaded file (could be audio or video)
-            file.save(filepath)
-            logger.info(f"Saved uploaded file to {filepath}")
-        except Exception as e:
-            logger.error(f"Failed to save file: {str(e)}")
-            return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
-
-        # Check if the file is a video and extract audio
-        if file.filename.lower().endswith(('.mp4', '.mov', '.avi', '.mkv')):
-            logger.info(f"Detected video file: {file.filename}")
-            if not extract_audio_from_video(filepath, audio_file_path):
-                return jsonify({"error": "Failed to extract audio from video"}), 500
+        if decode_profile and decode_profile not in DECODE_PROFILES:
+            return jsonify({"error": f"Unknown decodeProfile '{decode_profile}'. Choose from: {', '.join(DECODE_PROFILES)}"}), 400
+
+        if job_queue.depth() >= job_queue.max_queue_depth:
+            logger.warning("Job queue is full, rejecting upload")
+            return jsonify({"error": "Server is busy, please retry later"}), 503, {"Retry-After": "30"}
+
+        if (request.content_length or 0) > STREAMING_UPLOAD_BYTES:
+            # Large uploads are kept compressed on disk and decoded block by block
+            # by the job, rather than held in memory as PCM while queued
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            audio = os.path.join(UPLOAD_DIR, uuid.uuid4().hex)
+            try:
+                with request_context(g.request_id), span("upload_save"):
+                    file.save(audio)
+                logger.info(f"Spooled large upload {file.filename} to {audio}")
+            except Exception as e:
+                logger.error(f"Failed to save file: {str(e)}")
+                return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
         else:
-            logger.info(f"Detected audio file: {file.filename}")
-            audio_file_path = filepath  # Use the uploaded file directly as audio
-
-        logger.info(f"Starting transcription of {audio_file_path}")
-        transcript = transcribe_audio(audio_file_path)
-        
-        if not transcript:
-            logger.error("Failed to transcribe audio")
-            return jsonify({"error": "Failed to transcribe audio"}), 500
-            
-        logger.info(f"Transcription complete. Length: {len(transcript)} characters")
-        logger.info(f"Starting summary generation using model: {selected_model}")
-        
-        use_openai = selected_model == "openai"  # Convert to boolean
-        summary_data = summarize_and_extract_action_items(transcript, use_openai=use_openai, custom_prompt=custom_prompt)
-        
-        action_items = summary_data.get("action_items", [])
-        
-        # Only create Trello tasks if we have action items and Trello API keys are set
-        trello_responses = []
-        if action_items and os.getenv("TRELLO_API_KEY") and os.getenv("TRELLO_TOKEN"):
-            logger.info(f"Creating {len(action_items)} Trello tasks")
-            for item in action_items:
-                if isinstance(item, dict) and all(key in item for key in ["task", "assignee", "deadline"]):  # Validate action item format
-                    trello_response = create_trello_task(item["task"], item["assignee"], item["deadline"])
-                    trello_responses.append(trello_response)
-                else:
-                    logger.warning(f"Invalid action item format: {item}")
-        
-        # Clean up the temporary files
+            try:
+                # Decode straight from the upload stream; no temp files of our own
+                with request_context(g.request_id), span("upload_decode"):
+                    audio = decode_audio(file.stream)
+                logger.info(f"Decoded {file.filename}: {len(audio) / SAMPLE_RATE:.2f} seconds of audio")
+            except AudioDecodeError as e:
+                logger.error(f"Failed to decode upload: {str(e)}")
+                return jsonify({"error": f"Failed to decode audio: {str(e)}"}), 400
+
         try:
-            os.remove(filepath)
-            logger.info(f"Removed temporary file {filepath}")
-            if filepath != audio_file_path:  # Remove the extracted audio file if it's different
-                os.remove(audio_file_path)
-                logger.info(f"Removed temporary audio file {audio_file_path}")
-        except Exception as e:
-            logger.warning(f"Could not remove temporary file: {str(e)}")
-        
-        return jsonify({
-            "transcript": transcript, 
-            "summary_data": summary_data, 
-            "trello_responses": trello_responses
-        })
-    
+            job_id = job_queue.submit(
+                audio=audio,
+                filename=file.filename or "",
+                selected_model=selected_model,
+                custom_prompt=custom_prompt,
+                bypass_cache=bypass_cache,
+                request_id=g.request_id,
+                profile=profile,
+                decode_profile=decode_profile,
+            )
+        except QueueFull as e:
+            if isinstance(audio, str):
+                os.remove(audio)
+            logger.warning(str(e))
+            return jsonify({"error": "Server is busy, please retry later"}), 503, {"Retry-After": "30"}
+
+        job = {
+            "job_id": job_id,
+            "request_id": g.request_id,
+            "status": QUEUED,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
+            "events_url": f"/jobs/{job_id}/events"
+        }
+        if wants_event_stream():
+            return stream_job_events(job_id, first_event=("job", job))
+        return jsonify(job), 202
+
     except Exception as e:
         logger.error(f"Error in process_audio: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_status(job))
+
+@api.route("/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == SUCCEEDED:
+        return jsonify(job["result"])
+    if job["status"] == FAILED:
+        return jsonify({"error": job["error"] or "Job failed"}), 500
+    if job["status"] == CANCELLED:
+        return jsonify({"error": "Job was cancelled"}), 410
+    # Still queued or running
+    return jsonify(job_status(job)), 202
+
+@api.route("/jobs/<job_id>/events", methods=["GET"])
+def get_job_events(job_id):
+    """
+    Stream the job's events from the start. Jobs whose events are no longer held in
+    memory get a single final event built from the stored result.
+    """
+    if job_events.has(job_id):
+        return stream_job_events(job_id)
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == SUCCEEDED:
+        final = ("result", job["result"])
+    elif job["status"] == FAILED:
+        final = ("error", {"error": job["error"] or "Job failed"})
+    elif job["status"] == CANCELLED:
+        final = ("cancelled", None)
+    else:
+        return jsonify({"error": "Job events are not available"}), 404
+    return Response(sse_event(*final), mimetype="text/event-stream")
+
+@api.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = job_queue.cancel(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_status(job))
+
+def admin_authorized():
+    """
+    Admin endpoints need an X-Admin-Token header matching ADMIN_TOKEN, and are
+    closed to everyone while ADMIN_TOKEN is unset.
+    """
+    token = os.getenv("ADMIN_TOKEN")
+    return bool(token) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token)
+
+def int_arg(name, default, maximum):
+    try:
+        return max(0, min(int(request.args.get(name, default)), maximum))
+    except ValueError:
+        return default
+
+@api.route("/meetings", methods=["GET"])
+def list_meetings():
+    """
+    Stored meetings, most recent first: ?limit= (default 50) and ?offset=.
+    """
+    return jsonify(meeting_store.list(limit=int_arg("limit", 50, 500), offset=int_arg("offset", 0, 10 ** 9)))
+
+@api.route("/meetings/search", methods=["GET"])
+def search_meetings():
+    """
+    Ranked full-text search over every stored meeting's transcript, summary and action
+    items. ?q= is required; ?kind= (repeatable: transcript, summary, action_item),
+    ?meeting_id=, ?limit= (default 20) and ?offset= narrow it. Transcript hits carry
+    start_ms and end_ms, the chunk's offsets in the recording.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing search query 'q'"}), 400
+    hits = meeting_store.search(
+        query,
+        kinds=request.args.getlist("kind") or None,
+        meeting_id=request.args.get("meeting_id"),
+        limit=int_arg("limit", 20, 200),
+        offset=int_arg("offset", 0, 10 ** 9),
+    )
+    return jsonify({"query": query, "hits": hits})
+
+@api.route("/meetings/<meeting_id>", methods=["GET"])
+def get_meeting(meeting_id):
+    meeting = meeting_store.get(meeting_id)
+    if not meeting:
+        return jsonify({"error": "Meeting not found"}), 404
+    return jsonify(meeting)
+
+@api.route("/meetings/<meeting_id>", methods=["DELETE"])
+def delete_meeting(meeting_id):
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if not meeting_store.delete(meeting_id):
+        return jsonify({"error": "Meeting not found"}), 404
+    return jsonify({"deleted": meeting_id})
+
+@api.route("/metrics")
+def metrics():
+    """
+    Prometheus metrics: stage durations and errors, audio and chunk counters, LLM latency.
+    """
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+@api.route("/admin/transcript_cache", methods=["GET"])
+def transcript_cache_stats():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(transcript_cache.stats())
+
+@api.route("/admin/transcript_cache", methods=["DELETE"])
+def purge_transcript_cache():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    removed = transcript_cache.purge()
+    logger.info(f"Purged {removed} transcript cache entries")
+    return jsonify({"removed": removed, **transcript_cache.stats()})
+
+@api.route("/admin/llm_cache", methods=["GET"])
+def llm_cache_stats():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if llm_cache is None:
+        return jsonify({"backend": "off"})
+    return jsonify(llm_cache.stats())
+
+@api.route("/admin/llm_cache", methods=["DELETE"])
+def purge_llm_cache():
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if llm_cache is None:
+        return jsonify({"removed": 0, "backend": "off"})
+    removed = llm_cache.purge()
+    logger.info(f"Purged {removed} LLM response cache entries")
+    return jsonify({"removed": removed, **llm_cache.stats()})
+
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000, use_reloader=False)
\ No newline at end of file
+    app = create_app()
+    # Load and warm up Whisper in the background so the server accepts requests right away
+    if WHISPER_WARMUP:
+        whisper.start_warm_up()
+        if DECODE_FALLBACK_QUEUE_DEPTH > 0:
+            start_fallback_warm_up()
+    app.run(debug=True, host="0.0.0.0", port=int(os.getenv("PORT", "5000")), use_reloader=False)
\ No newline at end of file
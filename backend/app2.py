@@ -1,68 +1,116 @@
-from flask import Flask, render_template
-from flask_socketio import SocketIO, emit
-import openai
-import torch
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
+from flask import Flask, render_template, request, jsonify
+from flask_socketio import SocketIO
+from whisper_runtime import LazyWhisper, grad_context
+from llm_client import LLMClient
+from streaming_engine import StreamingEngine
+from audio_ingest import SAMPLE_RATE
 import numpy as np
-import io
 import os
 
-# Initialize Flask and SocketIO
+# Initialize Flask and SocketIO. Inference runs on the streaming engine's worker
+# threads, so Socket.IO uses plain threads rather than green threads.
 app = Flask(__name__)
-socketio = SocketIO(app)
+socketio = SocketIO(app, async_mode=os.getenv("SOCKETIO_ASYNC_MODE", "threading"))
 
-# Load Whisper model
-processor = WhisperProcessor.from_pretrained("openai/whisper-small")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-small").to("cpu")
-whisper_model.config.forced_decoder_ids = None
+# Whisper model, loaded on first use or by the warm-up at startup. Only its processor
+# is loaded when decoding goes to the shared inference service.
+whisper = LazyWhisper("openai/whisper-small", service_address=os.getenv("WHISPER_SERVICE_ADDRESS"))
 
-# OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Shared OpenAI client for the rolling summaries
+openai_client = LLMClient.from_env("openai", "OPENAI", "https://api.openai.com/v1", "OPENAI_API_KEY")
 
-# Buffer to store audio chunks
-audio_buffer = []
+def decode_segments(audio):
+    """
+    Transcribe up to 30s of audio into (text, start_sec, end_sec) segments using Whisper timestamps.
+    """
+    processor, whisper_model, _, runtime_profile, whisper_service = whisper.get()
+    duration = len(audio) / SAMPLE_RATE
+    if whisper_service:
+        input_features = processor(audio, sampling_rate=SAMPLE_RATE, return_tensors="np").input_features
+        segments = whisper_service.generate(list(input_features), task=None, timestamps=True)[0]
+        return [(text, start, duration if end is None else end) for text, start, end in segments]
+
+    input_features = processor(audio, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+    with grad_context(runtime_profile):
+        # No forced language or task: detect the language and transcribe it as spoken
+        predicted_ids = whisper_model.generate(input_features, return_timestamps=True, forced_decoder_ids=None)
+    decoded = processor.tokenizer.decode(predicted_ids[0], skip_special_tokens=True, output_offsets=True)
+    offsets = decoded.get("offsets") or []
+    if not offsets:
+        return [(decoded["text"], 0.0, duration)] if decoded["text"].strip() else []
+    return [(offset["text"], offset["timestamp"][0], offset["timestamp"][1]) for offset in offsets]
+
+def update_summary(previous_summary, new_text):
+    """
+    Fold newly committed discussion into the rolling summary using GPT-4.
+    """
+    content = f"Summarize the following discussion:\n\n{new_text}"
+    if previous_summary:
+        content = (
+            f"Summary of the discussion so far:\n\n{previous_summary}\n\n"
+            f"Update the summary to also cover what was said next:\n\n{new_text}"
+        )
+    return openai_client.chat(
+        "gpt-4",
+        [
+            {"role": "system", "content": "You are a helpful assistant that summarizes meeting discussions."},
+            {"role": "user", "content": content}
+        ],
+        max_tokens=200,
+    )
+
+def emit_to_session(session_id, event, payload):
+    socketio.emit(event, payload, to=session_id)
+
+# One streaming session per connected client
+engine = StreamingEngine(
+    decode_segments,
+    update_summary,
+    emit_to_session,
+    workers=int(os.getenv("STREAM_DECODE_WORKERS", "2")),
+    step_seconds=float(os.getenv("STREAM_STEP_SECONDS", "2")),
+    summary_interval=float(os.getenv("STREAM_SUMMARY_INTERVAL", "30")),
+)
 
 @app.route("/")
 def home():
     return render_template("index.html")
 
-@socketio.on("audio_chunk")
-def handle_audio_chunk(chunk):
-    try:
-        print("Received audio chunk")  # Debug log
-        audio_data = np.frombuffer(chunk, dtype=np.float32)
-        print(f"Audio data shape: {audio_data.shape}")  # Debug log
-        audio_buffer.append(audio_data)
+@app.route("/ready")
+def ready():
+    """
+    Readiness, separate from liveness on "/": 200 once Whisper is loaded and warmed up.
+    """
+    if whisper.warm:
+        return jsonify({"ready": True})
+    return jsonify({"ready": False, "error": whisper.error}), 503
 
-        # Process the buffer every 5 seconds
-        if len(audio_buffer) >= 5:  # Adjust based on chunk size
-            print("Processing audio buffer")  # Debug log
-            full_audio = np.concatenate(audio_buffer)
-            audio_buffer.clear()
+@app.route("/stats")
+def stats():
+    """
+    Active sessions and end-to-end latency per emitted transcript segment.
+    """
+    return jsonify(engine.stats())
 
-            # Transcribe the audio
-            input_features = processor(full_audio, sampling_rate=16000, return_tensors="pt").input_features
-            predicted_ids = whisper_model.generate(input_features)
-            transcription = processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-            print(f"Transcription: {transcription}")  # Debug log
+@socketio.on("connect")
+def handle_connect():
+    engine.open_session(request.sid)
 
-            # Emit the transcription to the frontend
-            emit("transcription", transcription)
+@socketio.on("disconnect")
+def handle_disconnect():
+    engine.close_session(request.sid)
 
-            # Generate a partial summary using GPT-4
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes meeting discussions."},
-                    {"role": "user", "content": f"Summarize the following discussion:\n\n{transcription}"}
-                ],
-                max_tokens=100,
-            )
-            summary = response.choices[0].message.content
-            print(f"Summary: {summary}")  # Debug log
-            emit("summary", summary)
+@socketio.on("audio_chunk")
+def handle_audio_chunk(chunk):
+    """
+    Queue a chunk of 16 kHz mono float32 audio for this client's session.
+    Decoding happens on the engine's workers, so the handler returns immediately.
+    """
+    try:
+        engine.add_audio(request.sid, np.frombuffer(chunk, dtype=np.float32))
     except Exception as e:
         print(f"Error processing audio chunk: {str(e)}")
 
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    whisper.start_warm_up()
+    socketio.run(app, host="0.0.0.0", port=5000, debug=True)
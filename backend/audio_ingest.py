@@ -0,0 +1,230 @@
+import hashlib
+import io
+import os
+import subprocess
+import threading
+import numpy as np
+
+# Everything downstream works on 16 kHz mono float32 PCM
+SAMPLE_RATE = 16000
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+PIPE_BLOCK_BYTES = 64 * 1024
+# How much of ffmpeg's stderr is kept for error messages
+STDERR_TAIL_BYTES = 8 * 1024
+# Samples per block when streaming decoded PCM (10 seconds)
+STREAM_BLOCK_SAMPLES = SAMPLE_RATE * 10
+
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg can't decode the input into PCM."""
+
+
+def _ffmpeg_command(input_spec):
+    return [
+        FFMPEG_BINARY,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-i", input_spec,
+        "-vn",  # Ignore any video stream
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+
+
+def _pump(stream, pipe):
+    """
+    Copy a readable stream into ffmpeg's stdin, then close it so ffmpeg sees EOF.
+    """
+    try:
+        while True:
+            block = stream.read(PIPE_BLOCK_BYTES)
+            if not block:
+                break
+            pipe.write(block)
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its stderr says why
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
+
+
+def _stream_fileno(stream):
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _drain(pipe, tail):
+    """
+    Read ffmpeg's stderr as it is written, keeping only the last STDERR_TAIL_BYTES.
+    Left unread, a damaged file can fill the pipe and block ffmpeg while we wait on stdout.
+    """
+    while True:
+        block = pipe.read(PIPE_BLOCK_BYTES)
+        if not block:
+            break
+        tail += block
+        del tail[:-STDERR_TAIL_BYTES]
+
+
+def open_decoder(source):
+    """
+    Start an ffmpeg process that decodes `source` to 16 kHz mono float32 PCM on stdout.
+    `source` is a file path or a readable binary stream such as an upload's stream.
+
+    Streams backed by a real file are handed to ffmpeg as its stdin and opened
+    through /dev/stdin so ffmpeg can still seek, which MP4/MOV files with the
+    index at the end need. Other streams are piped in from a writer thread.
+    stderr is read on its own thread into a bounded buffer.
+    Returns (process, writer_thread_or_None, (stderr_thread, stderr_tail)).
+    """
+    writer = None
+    if isinstance(source, (str, os.PathLike)):
+        command, stdin = _ffmpeg_command(os.fspath(source)), subprocess.DEVNULL
+    elif _stream_fileno(source) is not None:
+        source.seek(0)
+        command, stdin = _ffmpeg_command("/dev/stdin"), source
+    else:
+        command, stdin = _ffmpeg_command("pipe:0"), subprocess.PIPE
+
+    process = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if stdin is subprocess.PIPE:
+        writer = threading.Thread(target=_pump, args=(source, process.stdin), daemon=True)
+        writer.start()
+    tail = bytearray()
+    reader = threading.Thread(target=_drain, args=(process.stderr, tail), daemon=True)
+    reader.start()
+    return process, writer, (reader, tail)
+
+
+def _finish(process, writer, stderr):
+    if writer:
+        writer.join()
+    reader, tail = stderr
+    reader.join()
+    message = tail.decode("utf-8", errors="replace").strip()
+    if process.wait() != 0:
+        raise AudioDecodeError(message or f"ffmpeg exited with code {process.returncode}")
+
+
+def decode_audio(source):
+    """
+    Decode a file path or binary stream (audio or video) to a float32 PCM array at SAMPLE_RATE.
+    Nothing is written to disk.
+    """
+    try:
+        process, writer, stderr = open_decoder(source)
+    except FileNotFoundError:
+        raise AudioDecodeError(f"ffmpeg not found (looked for '{FFMPEG_BINARY}')")
+    pcm = process.stdout.read()
+    _finish(process, writer, stderr)
+    return np.frombuffer(pcm, dtype=np.float32)
+
+
+def iter_pcm_blocks(source, block_samples=STREAM_BLOCK_SAMPLES):
+    """
+    Yield float32 PCM blocks of up to `block_samples` samples as ffmpeg decodes `source`.
+    Only one block is held at a time, so memory does not grow with the input length.
+    """
+    try:
+        process, writer, stderr = open_decoder(source)
+    except FileNotFoundError:
+        raise AudioDecodeError(f"ffmpeg not found (looked for '{FFMPEG_BINARY}')")
+
+    completed = False
+    try:
+        while True:
+            data = process.stdout.read(block_samples * 4)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32)
+        completed = True
+    finally:
+        if not completed:
+            # The consumer stopped early or failed; don't leave ffmpeg running
+            process.kill()
+            process.wait()
+            if writer:
+                writer.join()
+            stderr[0].join()
+    _finish(process, writer, stderr)
+
+
+def hash_pcm_stream(source):
+    """
+    SHA-256 of the decoded PCM of `source` and its length in samples, in constant memory.
+    Matches hashlib.sha256(decode_audio(source).tobytes()).
+    """
+    digest = hashlib.sha256()
+    n_samples = 0
+    for block in iter_pcm_blocks(source):
+        digest.update(block.tobytes())
+        n_samples += len(block)
+    return digest.hexdigest(), n_samples
+
+
+def split_audio_into_chunks(audio, sr=16000, chunk_size=20, overlap=5):
+    """
+    Yield overlapping windows of `chunk_size` seconds, `overlap` seconds apart.
+    """
+    # Calculate step size and chunk size in samples
+    step_samples = int((chunk_size - overlap) * sr)
+    chunk_samples = int(chunk_size * sr)
+
+    for i in range(0, len(audio), step_samples):
+        chunk = audio[i:i + chunk_samples]
+        if len(chunk) < 0.5 * chunk_samples:  # Skip very small chunks
+            break
+        yield chunk
+
+
+def iter_audio_windows(blocks, sr=16000, chunk_size=20, overlap=5):
+    """
+    Streaming counterpart of split_audio_into_chunks: yield the same windows from an
+    iterable of PCM blocks while holding at most one window plus one block in memory.
+    """
+    step_samples = int((chunk_size - overlap) * sr)
+    chunk_samples = int(chunk_size * sr)
+    buffer = np.empty(0, dtype=np.float32)
+    filled = 0
+
+    for block in blocks:
+        if filled + len(block) > len(buffer):
+            grown = np.empty(chunk_samples + len(block), dtype=np.float32)
+            grown[:filled] = buffer[:filled]
+            buffer = grown
+        buffer[filled:filled + len(block)] = block
+        filled += len(block)
+
+        # Emit every full window, then slide the buffer forward by one step
+        while filled >= chunk_samples:
+            yield buffer[:chunk_samples].copy()
+            buffer[:filled - step_samples] = buffer[step_samples:filled]
+            filled -= step_samples
+
+    # Trailing partial windows, with the same cut-off as split_audio_into_chunks
+    while filled >= 0.5 * chunk_samples:
+        yield buffer[:filled].copy()
+        if filled <= step_samples:
+            break
+        buffer[:filled - step_samples] = buffer[step_samples:filled]
+        filled -= step_samples
+
+
+def count_chunks(n_samples, sr=16000, chunk_size=20, overlap=5):
+    """
+    Number of windows split_audio_into_chunks yields for `n_samples` of audio.
+    """
+    step_samples = int((chunk_size - overlap) * sr)
+    chunk_samples = int(chunk_size * sr)
+    count = 0
+    for i in range(0, n_samples, step_samples):
+        if n_samples - i < 0.5 * chunk_samples:
+            break
+        count += 1
+    return count
@@ -0,0 +1,1038 @@
+"""
+Benchmarks for the meeting summarizer backend.
+
+Run from the backend directory, e.g.:
+    python benchmark.py batch --audio tamil_audio.mp3 --batch-sizes 1 2 4 8
+    python benchmark.py profiles --audio tamil_audio.mp3
+    python benchmark.py decode-profiles --audio tamil_audio.mp3 --reference reference.txt
+    python benchmark.py streaming-memory --hours 0.25 1 4 --file
+    python benchmark.py segmentation --audio tamil_audio.mp3 --decode
+    python benchmark.py llm --latency 1.0 --rate-limit-every 5
+    python benchmark.py service --address temp/whisper.sock --clients 1 4 8
+    python benchmark.py startup --port 5055
+    python benchmark.py workers --audio tamil_audio.mp3 --configs 1x8 2x4 4x2 8x1
+    python benchmark.py llm-cache --latency 0.5
+    python benchmark.py trello --items 15 --latency 0.3
+    python benchmark.py e2e --format mp3 --seconds 120 --clients 1 4 --output e2e.json
+    python benchmark.py meeting-search --meetings 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from audio_ingest import decode_audio, iter_audio_windows, split_audio_into_chunks, STREAM_BLOCK_SAMPLES, SAMPLE_RATE
+from segmentation import iter_speech_windows, iter_array_blocks, MAX_WINDOW_SECONDS
+
+
+def audio_duration(audio_file_path):
+    """
+    Length of an audio file in seconds, at the 16 kHz rate used for transcription.
+    """
+    return len(decode_audio(audio_file_path)) / SAMPLE_RATE
+
+
+def bench_batch(args):
+    """
+    Real-time factor of transcribe_audio for each batch size.
+    The batch size 1 transcript is the reference every other run is compared against.
+    """
+    import utils
+
+    utils.whisper.warm_up()  # Keep model loading out of the first timing
+    duration = audio_duration(args.audio)
+    results = []
+    reference = None
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        transcript = utils.transcribe_audio(args.audio, batch_size=batch_size, use_cache=False)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = transcript
+        results.append({
+            "batch_size": batch_size,
+            "seconds": round(elapsed, 3),
+            "rtf": round(elapsed / duration, 4),
+            "matches_reference": transcript == reference,
+        })
+        if args.include_transcript:
+            results[-1]["transcript"] = transcript
+    return {"audio": args.audio, "audio_seconds": round(duration, 2), "results": results}
+
+
+def run_in_subprocess(argv, env=None):
+    """
+    Run this script with `argv` in a fresh interpreter and return its JSON report.
+    Settings that are fixed at import time (profiles, threads) need a new process each.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--output", output_path] + argv,
+            env={**os.environ, **(env or {})},
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(output_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(output_path)
+
+
+def bench_profiles(args):
+    """
+    Compare Whisper runtime profiles on the same audio, each in its own process.
+    """
+    from whisper_runtime import RUNTIME_PROFILES
+
+    profiles = args.profiles or list(RUNTIME_PROFILES)
+    results = []
+    reference = None
+    for profile in profiles:
+        report = run_in_subprocess(
+            ["batch", "--audio", args.audio, "--batch-sizes", str(args.batch_size), "--include-transcript"],
+            env={"WHISPER_PROFILE": profile},
+        )
+        run = report["results"][0]
+        if reference is None:
+            reference = run["transcript"]
+        results.append({
+            "profile": profile,
+            "seconds": run["seconds"],
+            "rtf": run["rtf"],
+            "matches_first_profile": run["transcript"] == reference,
+        })
+    return {"audio": args.audio, "batch_size": args.batch_size, "results": results}
+
+
+def normalize_words(text):
+    return "".join(c if c.isalnum() or c.isspace() else " " for c in text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level edit distance over the reference length, ignoring case and punctuation.
+    """
+    reference, hypothesis = normalize_words(reference), normalize_words(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def bench_decode_profiles(args):
+    """
+    Real-time factor and word error rate of each decode profile on the same audio.
+    WER is against --reference, a text file with the correct (English) transcript,
+    or else against the most accurate profile's own transcript. Models are loaded
+    once and shared, as in the server, and each is warmed up before it is timed.
+    """
+    import utils
+    from whisper_runtime import DECODE_PROFILES, get_decode_profile
+
+    profiles = args.profiles or list(DECODE_PROFILES)
+    duration = audio_duration(args.audio)
+    runs = []
+    for name in profiles:
+        model = utils.whisper_models.get(get_decode_profile(name)[1]["model"])
+        model.warm_up()
+        start = time.perf_counter()
+        transcript = utils.transcribe_audio(
+            args.audio, batch_size=args.batch_size, use_cache=False, decode_profile=name
+        )
+        elapsed = time.perf_counter() - start
+        runs.append((name, elapsed, transcript))
+
+    if args.reference:
+        with open(args.reference) as f:
+            reference, reference_name = f.read(), args.reference
+    else:
+        reference_name = max(runs, key=lambda run: list(DECODE_PROFILES).index(run[0]))[0]
+        reference = next(transcript for name, _, transcript in runs if name == reference_name)
+
+    results = []
+    for name, elapsed, transcript in runs:
+        profile = DECODE_PROFILES[name]
+        results.append({
+            "profile": name,
+            "model": profile["model"],
+            "num_beams": profile["num_beams"],
+            "seconds": round(elapsed, 3),
+            "rtf": round(elapsed / duration, 4),
+            "wer": round(word_error_rate(reference, transcript), 4),
+        })
+        if args.include_transcript:
+            results[-1]["transcript"] = transcript
+    return {
+        "audio": args.audio,
+        "audio_seconds": round(duration, 2),
+        "wer_reference": reference_name,
+        "batch_size": args.batch_size,
+        "results": results,
+    }
+
+
+def speech_like(t):
+    """
+    Voiced tone bursts at times `t` (seconds): 6s of syllable-rate "speech", then 2s
+    of pause, so segmentation sees speech-like regions. Phase is a closed form of t,
+    so blocks generated separately join up seamlessly.
+    """
+    phase = 120 * t - 40 / (2 * np.pi * 0.3) * np.cos(2 * np.pi * 0.3 * t)  # pitch 120 +- 40 Hz
+    voiced = sum(np.sin(2 * np.pi * k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    return 0.3 * voiced * syllables * ((t % 8) < 6)
+
+
+def synthetic_pcm_blocks(seconds, block_samples=STREAM_BLOCK_SAMPLES, speech=False):
+    """
+    Yield `seconds` of low-level noise as PCM blocks, without ever holding it all.
+    With `speech`, speech_like() bursts are mixed in so VAD finds speech to window.
+    """
+    rng = np.random.default_rng(0)
+    total = int(seconds * SAMPLE_RATE)
+    start = 0
+    while start < total:
+        n = min(block_samples, total - start)
+        block = rng.standard_normal(n) * 0.01
+        if speech:
+            block += speech_like((start + np.arange(n)) / SAMPLE_RATE)
+        yield block.astype(np.float32)
+        start += n
+
+
+def write_wav_blocks(path, blocks):
+    """
+    Write float32 PCM blocks to a 16-bit WAV file one block at a time.
+    """
+    import wave
+
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        for block in blocks:
+            f.writeframes((np.clip(block, -1, 1) * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def peak_memory_mb(windows):
+    """
+    Consume an iterator of windows under tracemalloc. Returns (window count, peak MB).
+    """
+    tracemalloc.start()
+    count = 0
+    for _ in windows:
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, round(peak / 1024 / 1024, 2)
+
+
+def bench_streaming_memory(args):
+    """
+    Peak memory of the streaming windowing paths for inputs of increasing length:
+    fixed windows and VAD windows over synthetic blocks and, with --file, the default
+    transcription path (ffmpeg, then VAD) over a generated WAV file.
+    Fails if any path's longest input needs more than `--max-growth` times its shortest's peak.
+    """
+    paths = {
+        "fixed": lambda hours: iter_audio_windows(synthetic_pcm_blocks(hours * 3600)),
+        "vad": lambda hours: iter_speech_windows(synthetic_pcm_blocks(hours * 3600, speech=True)),
+    }
+    temp_dir = tempfile.mkdtemp()
+    if args.file:
+        import utils
+
+        def file_windows(hours):
+            path = write_wav_blocks(
+                os.path.join(temp_dir, f"{hours}h.wav"), synthetic_pcm_blocks(hours * 3600, speech=True)
+            )
+            try:
+                yield from utils.iter_transcription_windows(path, True, "vad", MAX_WINDOW_SECONDS, 0)
+            finally:
+                os.remove(path)
+
+        paths["file"] = file_windows
+
+    report = {"max_growth": args.max_growth, "paths": {}}
+    failed = []
+    try:
+        for name, make_windows in paths.items():
+            results = []
+            for hours in args.hours:
+                windows, peak_mb = peak_memory_mb(make_windows(hours))
+                results.append({"hours": hours, "windows": windows, "peak_mb": peak_mb})
+            growth = results[-1]["peak_mb"] / results[0]["peak_mb"]
+            report["paths"][name] = {"results": results, "growth": round(growth, 3)}
+            if growth > args.max_growth:
+                failed.append(name)
+    finally:
+        os.rmdir(temp_dir)
+    if failed:
+        raise SystemExit(f"Peak memory grew with input length on {', '.join(failed)}: {json.dumps(report)}")
+    return report
+
+
+def bench_segmentation(args):
+    """
+    Encoder passes and audio seconds decoded per hour of input, fixed windows against VAD.
+    With --decode, also times a full uncached transcription for each scheme.
+    """
+    audio = decode_audio(args.audio)
+    duration = len(audio) / SAMPLE_RATE
+    windows = {
+        "fixed": list(split_audio_into_chunks(audio, SAMPLE_RATE, 20, 5)),
+        "vad": [window.audio for window in iter_speech_windows(iter_array_blocks(audio))],
+    }
+
+    results = []
+    for scheme, chunks in windows.items():
+        decoded_seconds = sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+        result = {
+            "segmentation": scheme,
+            "encoder_passes": len(chunks),
+            "encoder_passes_per_hour": round(len(chunks) * 3600 / duration, 1),
+            "decoded_audio_seconds": round(decoded_seconds, 2),
+            "decoded_to_input_ratio": round(decoded_seconds / duration, 3),
+        }
+        if args.decode:
+            import utils
+
+            start = time.perf_counter()
+            transcript = utils.transcribe_audio(audio, use_cache=False, segmentation=scheme)
+            elapsed = time.perf_counter() - start
+            result.update({"seconds": round(elapsed, 3), "rtf": round(elapsed / duration, 4), "words": len(transcript.split())})
+        results.append(result)
+    return {"audio": args.audio, "audio_seconds": round(duration, 2), "results": results}
+
+
+def bench_llm(args):
+    """
+    Wall time of the Llama summary stage against a stub LLM server with simulated
+    latency and periodic 429s, run sequentially and concurrently, `--rounds` times each.
+    Exits non-zero unless 429s were retried, every round parsed the stub's summary and
+    action items, and the concurrent runs took clearly less time than the sequential ones.
+    """
+    from stub_services import StubLLMServer, STUB_SUMMARY
+
+    expected_items = [
+        {"task": "Finalize the release checklist", "assignee": "Priya", "deadline": "Friday"},
+        {"task": "Book the QA environment", "assignee": "Arun", "deadline": "Monday"},
+    ]
+    with StubLLMServer(latency=args.latency, rate_limit_every=args.rate_limit_every) as llm:
+        os.environ["HUGGINGFACE_BASE_URL"] = llm.url
+        os.environ["OPENAI_BASE_URL"] = llm.url
+        os.environ["LLM_CACHE"] = "off"  # Keep stub replies out of the real response cache
+        import utils
+
+        transcript = "We agreed to ship the release next week. Priya will finalize the checklist."
+        sequential = concurrent = 0.0
+        results = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            summary = utils.summarize_with_llama(transcript, use_cache=False)
+            action_items = utils.extract_detailed_action_items(transcript, use_cache=False)
+            sequential += time.perf_counter() - start
+            results.append({"summary": summary, "action_items": action_items})
+
+            start = time.perf_counter()
+            results.append(utils.generate_local_summary(transcript, use_cache=False))
+            concurrent += time.perf_counter() - start
+
+        checks = {
+            "rate_limits_retried": llm.rate_limited > 0,
+            "results_match_stub": all(
+                result["summary"] == STUB_SUMMARY and result["action_items"] == expected_items for result in results
+            ),
+            "concurrent_overlaps": concurrent < args.max_concurrent_ratio * sequential,
+        }
+        report = {
+            "latency": args.latency,
+            "rate_limit_every": args.rate_limit_every,
+            "rounds": args.rounds,
+            "sequential_seconds": round(sequential, 3),
+            "concurrent_seconds": round(concurrent, 3),
+            "requests": llm.requests,
+            "rate_limited": llm.rate_limited,
+            "checks": checks,
+        }
+    if not all(checks.values()):
+        print(json.dumps(report, indent=2))
+        sys.exit("LLM stage checks failed")
+    return report
+
+
+def bench_llm_cache(args):
+    """
+    LLM response cache against a stub LLM server: a repeated request is served from
+    the cache without a remote call, re-indented prompts share an entry, a change of
+    model or sampling parameters misses, bypass refreshes the entry, and entries expire.
+    Exits non-zero if any check fails.
+    """
+    from llm_cache import DiskResponseCache, MemoryResponseCache
+    from llm_client import LLMClient
+    from stub_services import StubLLMServer
+
+    prompt = "Summarize the following meeting transcript.\n\nTranscript:\nWe ship next week."
+    indented = "\n".join("        " + line for line in prompt.splitlines())
+    messages = [{"role": "user", "content": prompt}]
+
+    with StubLLMServer(latency=args.latency) as llm, tempfile.TemporaryDirectory() as directory:
+        backends = {
+            "disk": DiskResponseCache(directory, max_bytes=1024 * 1024, ttl=args.ttl),
+            "memory": MemoryResponseCache(ttl=args.ttl),
+        }
+        results = {}
+        for name, cache in backends.items():
+            client = LLMClient("stub", llm.url, "STUB_API_KEY", cache=cache)
+            requests_before = llm.requests
+
+            start = time.perf_counter()
+            first = client.chat("stub-model", messages)
+            miss_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            second = client.chat("stub-model", messages)
+            hit_seconds = time.perf_counter() - start
+            after_hit = llm.requests
+
+            client.chat("stub-model", [{"role": "user", "content": indented}])
+            after_indented = llm.requests
+            client.chat("stub-model", messages, temperature=0.1)
+            client.chat("other-model", messages)
+            after_params = llm.requests
+            client.chat("stub-model", messages, use_cache=False)
+            after_bypass = llm.requests
+            time.sleep(args.ttl + 0.1)
+            client.chat("stub-model", messages)
+            after_expiry = llm.requests
+
+            checks = {
+                "repeat_is_hit": after_hit - requests_before == 1 and first == second,
+                "normalized_prompt_is_hit": after_indented == after_hit,
+                "params_and_model_miss": after_params - after_indented == 2,
+                "bypass_calls_remote": after_bypass - after_params == 1,
+                "expired_entry_misses": after_expiry - after_bypass == 1,
+            }
+            results[name] = {
+                "miss_seconds": round(miss_seconds, 4),
+                "hit_seconds": round(hit_seconds, 4),
+                "checks": checks,
+                "stats": cache.stats(),
+            }
+
+    report = {"latency": args.latency, "ttl": args.ttl, "results": results}
+    if not all(all(result["checks"].values()) for result in results.values()):
+        print(json.dumps(report, indent=2))
+        sys.exit("LLM cache checks failed")
+    return report
+
+
+def bench_trello(args):
+    """
+    Trello card creation against a stub Trello server with latency and periodic 429s:
+    one card at a time against concurrent creation, then re-processing the same
+    meeting from a fresh process, which must create no duplicates. Last, a server
+    slower than the client's timeout must still end up with one card per item.
+    Exits non-zero if any check fails.
+    """
+    from stub_services import StubTrelloServer
+    from trello_client import TrelloClient
+
+    items = [
+        {"task": f"Follow up on item {i}", "assignee": "Priya", "deadline": "Friday"}
+        for i in range(args.items)
+    ]
+    batch = items + [dict(items[0], task=items[0]["task"].upper())]  # Duplicate within the batch
+    os.environ.update({"TRELLO_API_KEY": "stub", "TRELLO_TOKEN": "stub"})
+
+    results = {}
+    for concurrency in (1, args.concurrency):
+        with StubTrelloServer(latency=args.latency, rate_limit_every=args.rate_limit_every) as trello:
+            os.environ["TRELLO_ID_LIST"] = f"list-{concurrency}"
+            client = TrelloClient(trello.api_url, max_concurrency=concurrency, max_retries=5)
+            start = time.perf_counter()
+            first = client.create_tasks(batch)
+            elapsed = time.perf_counter() - start
+            cards_after_first = len(trello.cards)
+
+            # A new client knows nothing of the first run; only the list can tell it
+            rerun = TrelloClient(trello.api_url, max_concurrency=concurrency, max_retries=5).create_tasks(items)
+            results[f"concurrency_{concurrency}"] = {
+                "seconds": round(elapsed, 3),
+                "requests": trello.requests,
+                "rate_limited": trello.rate_limited,
+                "checks": {
+                    "no_errors": not any("error" in response for response in first + rerun),
+                    "one_card_per_item": cards_after_first == len(items),
+                    "batch_duplicate_skipped": first[-1].get("skipped") is True,
+                    "rerun_creates_nothing": len(trello.cards) == cards_after_first
+                    and all(response.get("skipped") for response in rerun),
+                },
+            }
+
+    # Every request outlasts the client's timeout, so each POST may or may not have landed
+    slow_latency = 1.0
+    with StubTrelloServer(latency=slow_latency) as trello:
+        os.environ["TRELLO_ID_LIST"] = "list-slow"
+        client = TrelloClient(trello.api_url, timeout=slow_latency / 3, max_retries=3)
+        responses = client.create_tasks(items[:2])
+        time.sleep(slow_latency * 2)  # Let requests the client gave up on finish
+        results["slow_server"] = {
+            "requests": trello.requests,
+            "responses": responses,
+            "checks": {"one_card_per_item": len(trello.cards) == 2},
+        }
+
+    report = {"items": args.items, "latency": args.latency, "results": results}
+    if not all(all(result["checks"].values()) for result in results.values()):
+        print(json.dumps(report, indent=2))
+        sys.exit("Trello checks failed")
+    return report
+
+
+def bench_meeting_search(args):
+    """
+    Search latency of the meeting store filled with synthetic meetings of
+    `--segments` timed transcript chunks each.
+    """
+    import random
+    from meeting_store import MeetingStore
+
+    words = (
+        "release budget hiring roadmap customer launch deadline migration review design "
+        "security onboarding pricing invoice backlog sprint demo outage retro contract"
+    ).split()
+    people = ["Priya", "Arun", "Meera", "Karthik", "Divya"]
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = MeetingStore(os.path.join(directory, "meetings.db"))
+        start = time.perf_counter()
+        for m in range(args.meetings):
+            segments = [
+                {
+                    "text": " ".join(rng.choice(words) for _ in range(40)) + f" {rng.choice(people)}",
+                    "start_ms": i * 30000,
+                    "end_ms": (i + 1) * 30000,
+                }
+                for i in range(args.segments)
+            ]
+            items = [{"task": f"Follow up on the {rng.choice(words)}", "assignee": rng.choice(people), "deadline": "Friday"}]
+            store.save(f"meeting-{m}", " ".join(s["text"] for s in segments), segments, "Summary", items)
+        fill_seconds = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(args.queries):
+            query = " ".join(rng.sample(words, rng.choice([1, 2]))) + rng.choice(["", f" {rng.choice(people)}"])
+            start = time.perf_counter()
+            store.search(query, limit=20)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+    return {
+        "meetings": args.meetings,
+        "segments_per_meeting": args.segments,
+        "fill_seconds": round(fill_seconds, 2),
+        "queries": args.queries,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+    }
+
+
+def bench_service(args):
+    """
+    Aggregate throughput of the shared Whisper service with N clients decoding at once.
+    Start the service first: python inference_service.py --address <address>
+    """
+    import threading
+    from inference_service import WhisperServiceClient
+    from whisper_runtime import load_processor
+
+    audio = decode_audio(args.audio)
+    chunks = [window.audio for window in iter_speech_windows(iter_array_blocks(audio))]
+    processor = load_processor()
+    features = list(processor(chunks, sampling_rate=SAMPLE_RATE, return_tensors="np").input_features)
+    duration = len(audio) / SAMPLE_RATE
+    client = WhisperServiceClient(args.address)
+    client.ping()
+
+    results = []
+    for clients in args.clients:
+        def run():
+            for feature in features:
+                client.generate([feature])
+
+        threads = [threading.Thread(target=run) for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        results.append({
+            "clients": clients,
+            "seconds": round(elapsed, 3),
+            "audio_seconds_per_second": round(clients * duration / elapsed, 2),
+        })
+    return {"audio": args.audio, "chunks": len(features), "results": results}
+
+
+def bench_workers(args):
+    """
+    Real-time factor of process-pool decoding for several workers x threads-per-worker
+    splits of the same CPUs. Model loading is warmed up before each timing.
+    The first configuration's transcript is the reference for the others.
+    """
+    from transcription_pool import TranscriptionPool
+    from whisper_runtime import get_runtime_profile
+
+    audio = decode_audio(args.audio)
+    chunks = [window.audio for window in iter_speech_windows(iter_array_blocks(audio))]
+    duration = len(audio) / SAMPLE_RATE
+    profile_name = get_runtime_profile()[0]
+
+    results = []
+    reference = None
+    for config in args.configs:
+        workers, threads = (int(n) for n in config.lower().split("x"))
+        pool = TranscriptionPool("openai/whisper-small", workers, threads, profile_name)
+        try:
+            silence = [np.zeros(SAMPLE_RATE, dtype=np.float32)] * workers
+            list(pool.decode_chunks(silence, batch_size=1))
+            start = time.perf_counter()
+            transcript = " ".join(pool.decode_chunks(chunks, batch_size=args.batch_size))
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        if reference is None:
+            reference = transcript
+        results.append({
+            "workers": workers,
+            "threads_per_worker": threads,
+            "seconds": round(elapsed, 3),
+            "rtf": round(elapsed / duration, 4),
+            "matches_first_config": transcript == reference,
+        })
+    return {"audio": args.audio, "audio_seconds": round(duration, 2), "chunks": len(chunks), "results": results}
+
+
+def wait_for_http(url, deadline, process):
+    """
+    Poll `url` until it answers 200. Returns seconds waited, or None on timeout or exit.
+    """
+    import urllib.error
+    import urllib.request
+
+    start = time.perf_counter()
+    while time.perf_counter() < deadline and process.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return round(time.perf_counter() - start, 3)
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def bench_startup(args):
+    """
+    Cold-start cost of the Flask backend: how long `import app` takes, how long until
+    the server answers its first request, and how long until Whisper is warm (/ready).
+    """
+    import_seconds = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import app"], check=True, stdout=subprocess.DEVNULL)
+        import_seconds.append(time.perf_counter() - start)
+
+    env = {**os.environ, "PORT": str(args.port)}
+    base_url = f"http://127.0.0.1:{args.port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "app.py"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + args.timeout
+        first_request = wait_for_http(f"{base_url}/", deadline, process)
+        if first_request is not None:
+            first_request = round(time.perf_counter() - start, 3)
+        ready = wait_for_http(f"{base_url}/ready", deadline, process)
+        if ready is not None:
+            ready = round(time.perf_counter() - start, 3)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "import_seconds": round(min(import_seconds), 3),
+        "time_to_first_request_seconds": first_request,
+        "time_to_ready_seconds": ready,
+    }
+
+
+def synthesize_recording(path, seconds, fmt="wav", speech_file=None, seed=0):
+    """
+    Write a synthetic recording of `seconds` to `path` as wav, mp3 or mp4 (with a
+    black video track). The audio is `speech_file` repeated to length, or without one,
+    speech_like() tone bursts.
+    A little seeded noise makes every seed's recording hash differently.
+    """
+    from audio_ingest import FFMPEG_BINARY
+
+    n = int(seconds * SAMPLE_RATE)
+    rng = np.random.default_rng(seed)
+    if speech_file:
+        speech = decode_audio(speech_file)
+        audio = np.tile(speech, -(-n // len(speech)))[:n]
+    else:
+        audio = speech_like(np.arange(n) / SAMPLE_RATE)
+    audio = np.clip(audio + rng.standard_normal(n) * 0.003, -1, 1)
+
+    wav_path = write_wav_blocks(path if fmt == "wav" else f"{path}.wav", [audio])
+    if fmt == "wav":
+        return path
+
+    command = [FFMPEG_BINARY, "-y", "-loglevel", "error"]
+    if fmt == "mp4":
+        command += ["-f", "lavfi", "-i", f"color=c=black:s=320x240:r=5:d={seconds}"]
+    command += ["-i", wav_path]
+    if fmt == "mp4":
+        command += ["-c:v", "libx264", "-c:a", "aac", "-shortest"]
+    elif fmt == "mp3":
+        command += ["-c:a", "libmp3lame", "-b:a", "64k"]
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected wav, mp3 or mp4")
+    try:
+        subprocess.run(command + [path], check=True)
+    finally:
+        os.remove(wav_path)
+    return path
+
+
+def post_multipart(url, fields, file_field, file_path, headers=None):
+    """
+    POST a multipart/form-data upload with the standard library. Returns the open response.
+    """
+    import urllib.request
+    import uuid
+
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode("utf-8")
+        )
+    with open(file_path, "rb") as f:
+        data = f.read()
+    parts.append(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{file_field}\"; "
+        f"filename=\"{os.path.basename(file_path)}\"\r\nContent-Type: application/octet-stream\r\n\r\n".encode("utf-8")
+        + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    request = urllib.request.Request(url, data=b"".join(parts), method="POST", headers={
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        **(headers or {}),
+    })
+    return urllib.request.urlopen(request, timeout=3600)
+
+
+def iter_sse(response):
+    """
+    Yield (event, data) from a Server-Sent Events response.
+    """
+    event, data = None, []
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if event:
+                yield event, json.loads("\n".join(data)) if data else None
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+def run_e2e_request(base_url, recording, audio_seconds, model):
+    """
+    Upload one recording with stream=true and time each pipeline stage from the job's
+    events. Stage times run from one stage event to the next; "upload" covers the
+    request up to the job being queued, including decoding small uploads.
+    """
+    start = time.perf_counter()
+    marks = []  # (stage, seconds since start)
+    first_transcript = None
+    decode_profile = None
+    outcome = "no result"
+    with post_multipart(f"{base_url}/process_audio", {"model": model, "stream": "true"}, "audio", recording) as response:
+        marks.append(("upload", 0.0))
+        for event, data in iter_sse(response):
+            now = time.perf_counter() - start
+            if event == "job":
+                marks.append(("queued", now))
+            elif event == "stage" and data.get("stage") != marks[-1][0]:
+                marks.append((data["stage"], now))
+            elif event == "transcript" and first_transcript is None:
+                first_transcript = now
+            elif event in ("result", "error", "cancelled"):
+                outcome = "ok" if event == "result" else (data or {}).get("error", event)
+                if event == "result":
+                    decode_profile = (data.get("decode_profile") or {}).get("used")
+                break
+    total = time.perf_counter() - start
+
+    stages = {}
+    for (stage, at), (_, next_at) in zip(marks, marks[1:] + [("done", total)]):
+        stages[stage] = round(stages.get(stage, 0) + next_at - at, 3)
+    return {
+        "outcome": outcome,
+        "seconds": round(total, 3),
+        "first_transcript_seconds": round(first_transcript, 3) if first_transcript is not None else None,
+        "stages": stages,
+        "rtf": round(stages.get("transcribing", 0) / audio_seconds, 4),
+        "decode_profile": decode_profile,
+    }
+
+
+def process_peak_rss_mb(pid):
+    """
+    Peak resident set size of a process plus that of each of its descendants (e.g.
+    transcription pool workers) from /proc, or None off Linux. With descendants this
+    is an upper bound, since their peaks need not coincide.
+    """
+    def peak(pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return 0.0
+
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(child) for child in f.read().split()]
+    except OSError:
+        return None
+    return round(peak(pid) + sum(process_peak_rss_mb(child) or 0 for child in children), 1)
+
+
+def bench_e2e(args):
+    """
+    The whole /process_audio pipeline on synthetic recordings, against a real backend
+    process whose LLM and Trello calls go to local stub servers. For each client count,
+    that many uploads run at once; reports per-stage wall time, real-time factor,
+    throughput and the backend's peak RSS. Caches are off so every run does the work.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from stub_services import StubLLMServer, StubTrelloServer
+
+    with tempfile.TemporaryDirectory() as directory, \
+            StubLLMServer(latency=args.llm_latency) as llm, \
+            StubTrelloServer(latency=args.trello_latency) as trello:
+        max_clients = max(args.clients)
+        recordings = []
+        for seed in range(max_clients):
+            path = os.path.join(directory, f"recording-{seed}.{args.format}")
+            recordings.append(synthesize_recording(path, args.seconds, args.format, args.speech_file, seed))
+        recording_bytes = os.path.getsize(recordings[0])
+
+        env = {
+            **os.environ,
+            "PORT": str(args.port),
+            "JOBS_DB_PATH": os.path.join(directory, "jobs.db"),
+            "MEETINGS_DB_PATH": os.path.join(directory, "meetings.db"),
+            "UPLOAD_DIR": os.path.join(directory, "uploads"),
+            "JOB_WORKERS": str(args.job_workers or max_clients),
+            "JOB_QUEUE_DEPTH": str(max_clients * 2),
+            "TRANSCRIPT_CACHE_DIR": os.path.join(directory, "transcript_cache"),
+            "TRANSCRIPT_CACHE_MAX_MB": "0",
+            "DECODE_FALLBACK_QUEUE_DEPTH": "0",  # Every run decodes with the same profile
+            "LLM_CACHE": "off",
+            "HUGGINGFACE_BASE_URL": llm.url,
+            "OPENAI_BASE_URL": llm.url,
+            "OPENAI_API_KEY": "stub",
+            "HUGGINGFACE_API_KEY": "stub",
+            "TRELLO_BASE_URL": trello.api_url,
+            "TRELLO_API_KEY": "stub",
+            "TRELLO_TOKEN": "stub",
+            "TRELLO_ID_LIST": "benchmark",
+        }
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen([sys.executable, "app.py"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if wait_for_http(f"{base_url}/ready", time.perf_counter() + args.timeout, server) is None:
+                raise SystemExit("Backend did not become ready")
+
+            runs = []
+            for clients in args.clients:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=clients) as pool:
+                    timings = list(pool.map(
+                        lambda recording: run_e2e_request(base_url, recording, args.seconds, args.model),
+                        recordings[:clients],
+                    ))
+                elapsed = time.perf_counter() - start
+                ok = [timing for timing in timings if timing["outcome"] == "ok"]
+                stage_names = sorted({stage for timing in ok for stage in timing["stages"]})
+                runs.append({
+                    "clients": clients,
+                    "wall_seconds": round(elapsed, 3),
+                    "succeeded": len(ok),
+                    "recordings_per_minute": round(len(ok) * 60 / elapsed, 2),
+                    "audio_seconds_per_second": round(len(ok) * args.seconds / elapsed, 2),
+                    "mean_stage_seconds": {
+                        stage: round(sum(r["stages"].get(stage, 0) for r in ok) / len(ok), 3) for stage in stage_names
+                    } if ok else {},
+                    "mean_rtf": round(sum(r["rtf"] for r in ok) / len(ok), 4) if ok else None,
+                    "requests": timings,
+                })
+            peak_rss = process_peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "recording": {
+            "format": args.format,
+            "seconds": args.seconds,
+            "bytes": recording_bytes,
+            "source": args.speech_file or "synthetic tones",
+        },
+        "model": args.model,
+        "llm_latency": args.llm_latency,
+        "trello_latency": args.trello_latency,
+        "llm_requests": llm.requests,
+        "trello_cards": len(trello.cards),
+        "peak_rss_mb": peak_rss,
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend benchmarks")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    batch = subparsers.add_parser("batch", help="Real-time factor against Whisper batch size")
+    batch.add_argument("--audio", default="tamil_audio.mp3")
+    batch.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    batch.add_argument("--include-transcript", action="store_true")
+    batch.set_defaults(func=bench_batch)
+
+    profiles = subparsers.add_parser("profiles", help="Compare Whisper runtime profiles")
+    profiles.add_argument("--audio", default="tamil_audio.mp3")
+    profiles.add_argument("--profiles", nargs="+", help="Profiles to compare (default: all)")
+    profiles.add_argument("--batch-size", type=int, default=1)
+    profiles.set_defaults(func=bench_profiles)
+
+    decode_profiles = subparsers.add_parser("decode-profiles", help="Real-time factor and WER of each decode profile")
+    decode_profiles.add_argument("--audio", default="tamil_audio.mp3")
+    decode_profiles.add_argument("--profiles", nargs="+", help="Profiles to compare (default: all)")
+    decode_profiles.add_argument("--reference", help="Reference transcript for WER (default: the most accurate profile)")
+    decode_profiles.add_argument("--batch-size", type=int, default=1)
+    decode_profiles.add_argument("--include-transcript", action="store_true")
+    decode_profiles.set_defaults(func=bench_decode_profiles)
+
+    streaming = subparsers.add_parser("streaming-memory", help="Check streaming memory stays flat with input length")
+    streaming.add_argument("--hours", type=float, nargs="+", default=[0.25, 1, 4])
+    streaming.add_argument("--max-growth", type=float, default=1.5)
+    streaming.add_argument("--file", action="store_true", help="Also check ffmpeg + VAD over generated WAV files")
+    streaming.set_defaults(func=bench_streaming_memory)
+
+    segmentation = subparsers.add_parser("segmentation", help="Compare fixed-window and VAD segmentation")
+    segmentation.add_argument("--audio", default="tamil_audio.mp3")
+    segmentation.add_argument("--decode", action="store_true", help="Also time full transcriptions")
+    segmentation.set_defaults(func=bench_segmentation)
+
+    llm = subparsers.add_parser("llm", help="LLM stage latency against a stub server")
+    llm.add_argument("--latency", type=float, default=1.0)
+    llm.add_argument("--rate-limit-every", type=int, default=5)
+    llm.add_argument("--rounds", type=int, default=3)
+    llm.add_argument(
+        "--max-concurrent-ratio", type=float, default=0.75,
+        help="Fail unless concurrent time is below this fraction of sequential time",
+    )
+    llm.set_defaults(func=bench_llm)
+
+    llm_cache = subparsers.add_parser("llm-cache", help="Check the LLM response cache against a stub server")
+    llm_cache.add_argument("--latency", type=float, default=0.5)
+    llm_cache.add_argument("--ttl", type=float, default=1.0, help="Entry TTL in seconds for the expiry check")
+    llm_cache.set_defaults(func=bench_llm_cache)
+
+    trello = subparsers.add_parser("trello", help="Serial against concurrent Trello card creation, and deduplication")
+    trello.add_argument("--items", type=int, default=15)
+    trello.add_argument("--latency", type=float, default=0.3)
+    trello.add_argument("--concurrency", type=int, default=4)
+    trello.add_argument("--rate-limit-every", type=int, default=7)
+    trello.set_defaults(func=bench_trello)
+
+    e2e = subparsers.add_parser("e2e", help="Full /process_audio pipeline on synthetic audio against stub services")
+    e2e.add_argument("--format", choices=["wav", "mp3", "mp4"], default="mp3")
+    e2e.add_argument("--seconds", type=float, default=120, help="Length of each synthetic recording")
+    e2e.add_argument("--speech-file", help="Repeat this recording instead of generating tones")
+    e2e.add_argument("--clients", type=int, nargs="+", default=[1, 4], help="Concurrent uploads per run")
+    e2e.add_argument("--job-workers", type=int, help="Backend JOB_WORKERS (default: the most clients)")
+    e2e.add_argument("--model", choices=["openai", "local"], default="local")
+    e2e.add_argument("--llm-latency", type=float, default=1.0)
+    e2e.add_argument("--trello-latency", type=float, default=0.2)
+    e2e.add_argument("--port", type=int, default=5056)
+    e2e.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the backend to be ready")
+    e2e.set_defaults(func=bench_e2e)
+
+    meeting_search = subparsers.add_parser("meeting-search", help="Meeting store search latency at scale")
+    meeting_search.add_argument("--meetings", type=int, default=5000)
+    meeting_search.add_argument("--segments", type=int, default=60, help="Timed chunks per meeting")
+    meeting_search.add_argument("--queries", type=int, default=200)
+    meeting_search.set_defaults(func=bench_meeting_search)
+
+    service = subparsers.add_parser("service", help="Throughput of the shared Whisper service under concurrent clients")
+    service.add_argument("--address", default=os.getenv("WHISPER_SERVICE_ADDRESS", "temp/whisper.sock"))
+    service.add_argument("--audio", default="tamil_audio.mp3")
+    service.add_argument("--clients", type=int, nargs="+", default=[1, 4, 8])
+    service.set_defaults(func=bench_service)
+
+    startup = subparsers.add_parser("startup", help="Import time, time to first request and time to ready")
+    startup.add_argument("--port", type=int, default=5055)
+    startup.add_argument("--repeats", type=int, default=3, help="Import timings to take the best of")
+    startup.add_argument("--timeout", type=float, default=600)
+    startup.set_defaults(func=bench_startup)
+
+    cpus = os.cpu_count() or 1
+    workers = subparsers.add_parser("workers", help="Real-time factor of process-pool decoding per workers x threads")
+    workers.add_argument("--audio", default="tamil_audio.mp3")
+    workers.add_argument(
+        "--configs", nargs="+", default=[f"{n}x{max(1, cpus // n)}" for n in (1, 2, 4) if n <= cpus],
+        help="WORKERSxTHREADS configurations, e.g. 1x8 2x4 4x2",
+    )
+    workers.add_argument("--batch-size", type=int, default=1)
+    workers.set_defaults(func=bench_workers)
+
+    args = parser.parse_args()
+    report = args.func(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
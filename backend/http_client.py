@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HTTPClientError(Exception):
+    """Raised when a request fails after all retries, or with a non-retryable status."""
+
+
+class PooledHTTPClient:
+    """
+    Base for clients of one remote API. Keeps a pooled keep-alive session, applies a
+    timeout to every request, retries 429s, 5xx responses and connection errors with
+    jittered exponential backoff, and caps the number of requests in flight.
+    Subclasses set `error` to the exception type raised on failure.
+    """
+
+    error = HTTPClientError
+
+    def __init__(self, name, timeout=60.0, max_retries=3, max_concurrency=4, backoff_base=0.5, backoff_max=20.0):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        """
+        Delay before retry number `attempt`: the server's Retry-After if given,
+        otherwise full jitter over an exponentially growing cap.
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, before_retry=None, **kwargs):
+        """
+        Send a request with retries and return the successful response.
+        For requests that aren't idempotent, `before_retry()` is called before retrying
+        a failure that may have been applied anyway (anything but a 429). If it returns
+        a value, the request is not retried and that value is returned instead. After a
+        read timeout such a request is never resent, as the server may still be applying it.
+        """
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            maybe_applied = True
+            resend = True
+            try:
+                with self._slots:
+                    response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                maybe_applied = response.status_code != 429
+                error = f"HTTP {response.status_code}"
+            except requests.ReadTimeout as e:
+                error = str(e)
+                resend = before_retry is None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except requests.HTTPError as e:
+                raise self.error(f"{self.name} request failed: {str(e)}")
+
+            if attempt == self.max_retries and resend:
+                raise self.error(f"{self.name} request failed after {attempt + 1} attempts: {error}")
+            delay = self._backoff(attempt, retry_after)
+            next_step = "retrying" if resend else "checking whether it was applied"
+            logger.warning(f"{self.name} request failed ({error}), {next_step} in {delay:.2f}s")
+            time.sleep(delay)
+            if before_retry and maybe_applied:
+                result = before_retry()
+                if result is not None:
+                    return result
+            if not resend:
+                raise self.error(f"{self.name} request timed out and may still be applied, not resending: {error}")
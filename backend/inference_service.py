@@ -0,0 +1,305 @@
+"""
+Shared Whisper inference service.
+
+One process owns the Whisper model and serves decode requests from every Flask
+and Socket.IO worker over a local socket. Requests from different clients are
+combined into batches of up to --max-batch-size chunks, waiting at most
+--max-wait-ms for a batch to fill. Start it with:
+
+    python inference_service.py --address /tmp/whisper.sock
+
+and point the web workers at it with WHISPER_SERVICE_ADDRESS=/tmp/whisper.sock.
+
+Requests are pickled, so only trusted clients may connect. A Unix socket is created
+readable by its owner only, and its secret is generated per run into a 0600
+"<socket>.key" file next to it. A TCP address needs WHISPER_SERVICE_AUTHKEY.
+"""
+import argparse
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+
+from telemetry import TOKENS_GENERATED
+
+logger = logging.getLogger(__name__)
+
+def parse_address(address):
+    """
+    "host:port" is a TCP address, anything else a Unix socket path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def authkey_path(address):
+    return f"{address}.key"
+
+
+def service_authkey(address, create=False):
+    """
+    The connection secret for a parsed `address`: WHISPER_SERVICE_AUTHKEY if set,
+    otherwise, for a Unix socket, the key file next to it. With `create`, the service
+    writes a fresh random key there, readable by its owner only.
+    """
+    key = os.getenv("WHISPER_SERVICE_AUTHKEY")
+    if key:
+        return key.encode("utf-8")
+    if not isinstance(address, str):
+        raise ValueError("WHISPER_SERVICE_AUTHKEY must be set to serve or connect over TCP")
+    path = authkey_path(address)
+    if create:
+        key = secrets.token_hex(32)
+        if os.path.exists(path):
+            os.remove(path)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(key)
+        return key.encode("utf-8")
+    try:
+        with open(path) as f:
+            return f.read().strip().encode("utf-8")
+    except OSError as e:
+        raise WhisperServiceError(f"Can't read the Whisper service key {path}: {str(e)}")
+
+
+class DynamicBatcher:
+    """
+    Collects work items from many threads into batches for `run_batch(key, items)`.
+    Only items with the same key (the decode options) share a batch. A batch runs
+    as soon as it has `max_batch_size` items or its oldest item has waited `max_wait_ms`.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=50):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = deque()  # (key, item, future, enqueued_at)
+        self._condition = threading.Condition()
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._loop, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, item):
+        future = Future()
+        with self._condition:
+            self._pending.append((key, item, future, time.monotonic()))
+            self._condition.notify()
+        return future
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            key, _, _, first_at = self._pending[0]
+            deadline = first_at + self.max_wait
+            while True:
+                matching = sum(1 for pending in self._pending if pending[0] == key)
+                remaining = deadline - time.monotonic()
+                if matching >= self.max_batch_size or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch, rest = [], deque()
+            for pending in self._pending:
+                if pending[0] == key and len(batch) < self.max_batch_size:
+                    batch.append(pending)
+                else:
+                    rest.append(pending)
+            self._pending = rest
+            return key, batch
+
+    def _loop(self):
+        while True:
+            key, batch = self._take_batch()
+            try:
+                results = self.run_batch(key, [item for _, item, _, _ in batch])
+                for (_, _, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} failed: {str(e)}")
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+
+class WhisperService:
+    """
+    Owns the Whisper model and answers decode requests from WhisperServiceClients.
+    Each request carries log-mel input features for one or more chunks and the decode
+    options; the result is one transcript (or list of timestamped segments) per chunk.
+    """
+
+    def __init__(self, model_name="openai/whisper-small", max_batch_size=8, max_wait_ms=50):
+        from whisper_runtime import load_whisper
+
+        self.processor, self.model, self.profile_name, self.profile = load_whisper(model_name)
+        self.model.config.forced_decoder_ids = None
+        self.batcher = DynamicBatcher(self._run_batch, max_batch_size, max_wait_ms)
+
+    def _run_batch(self, options, features):
+        import numpy as np
+        import torch
+        from whisper_runtime import grad_context
+
+        task, timestamps, max_length, num_beams = options
+        input_features = torch.from_numpy(np.stack(features))
+        kwargs = {"max_length": max_length}
+        if num_beams > 1:
+            kwargs["num_beams"] = num_beams
+        if task:
+            kwargs["task"] = task
+        if timestamps:
+            kwargs["return_timestamps"] = True
+        with grad_context(self.profile):
+            predicted_ids = self.model.generate(
+                input_features,
+                attention_mask=torch.ones_like(input_features),
+                **kwargs,
+            )
+
+        # Each item's result is paired with its generated token count, for the client's metrics
+        tokens = (predicted_ids != self.processor.tokenizer.pad_token_id).sum(dim=1).tolist()
+        if not timestamps:
+            return list(zip(self.processor.batch_decode(predicted_ids, skip_special_tokens=True), tokens))
+        results = []
+        for ids in predicted_ids:
+            decoded = self.processor.tokenizer.decode(ids, skip_special_tokens=True, output_offsets=True)
+            offsets = decoded.get("offsets") or []
+            if offsets:
+                results.append([(o["text"], o["timestamp"][0], o["timestamp"][1]) for o in offsets])
+            else:
+                results.append([(decoded["text"], 0.0, None)] if decoded["text"].strip() else [])
+        return list(zip(results, tokens))
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "profile": self.profile_name}
+        if command == "stats":
+            return {"ok": True, "batches": self.batcher.batches, "items": self.batcher.items}
+        if command != "generate":
+            return {"ok": False, "error": f"Unknown command '{command}'"}
+
+        options = (
+            request.get("task"),
+            bool(request.get("timestamps")),
+            int(request.get("max_length", 448)),
+            int(request.get("num_beams", 1)),
+        )
+        futures = [self.batcher.submit(options, features) for features in request["features"]]
+        results = [future.result() for future in futures]
+        return {"ok": True, "results": [result for result, _ in results], "tokens": sum(tokens for _, tokens in results)}
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = self.handle(request)
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                conn.send(response)
+
+    def serve_forever(self, address):
+        address = parse_address(address)
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)  # Stale socket from a previous run
+        authkey = service_authkey(address, create=True)
+        umask = os.umask(0o177)  # The socket is created owner-only
+        try:
+            listener = Listener(address, authkey=authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            logger.info(f"Whisper service listening on {address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+class WhisperServiceError(Exception):
+    """Raised when the Whisper service reports a failure."""
+
+
+class WhisperServiceClient:
+    """
+    Client for WhisperService. Each thread keeps its own connection, so requests
+    from concurrent jobs reach the service together and can share batches.
+    """
+
+    def __init__(self, address):
+        self.address = parse_address(address)
+        self._local = threading.local()
+
+    def _request(self, request):
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            try:
+                if conn is None:
+                    conn = Client(self.address, authkey=service_authkey(self.address))
+                    self._local.conn = conn
+                conn.send(request)
+                response = conn.recv()
+                break
+            except (EOFError, OSError):
+                # The service restarted or dropped us; reconnect once
+                self._local.conn = None
+                if attempt:
+                    raise
+        if not response.get("ok"):
+            raise WhisperServiceError(response.get("error", "Unknown error"))
+        return response
+
+    def generate(self, features, task="translate", timestamps=False, max_length=448, num_beams=1):
+        """
+        Decode a list of log-mel feature arrays. Returns one transcript per chunk, or
+        with `timestamps`, one list of (text, start_sec, end_sec) segments per chunk.
+        `num_beams` above one decodes with beam search. The tokens the service
+        generated are added to this process's token counter.
+        """
+        response = self._request({
+            "command": "generate",
+            "features": list(features),
+            "task": task,
+            "timestamps": timestamps,
+            "max_length": max_length,
+            "num_beams": num_beams,
+        })
+        TOKENS_GENERATED.inc(response.get("tokens", 0))
+        return response["results"]
+
+    def ping(self):
+        return self._request({"command": "ping"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Whisper inference service")
+    parser.add_argument("--address", default=os.getenv("WHISPER_SERVICE_ADDRESS", "temp/whisper.sock"))
+    parser.add_argument("--model", default="openai/whisper-small")
+    parser.add_argument("--max-batch-size", type=int, default=int(os.getenv("WHISPER_SERVICE_MAX_BATCH", "8")))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("WHISPER_SERVICE_MAX_WAIT_MS", "50")))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = WhisperService(args.model, args.max_batch_size, args.max_wait_ms)
+    service.serve_forever(args.address)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested."""
+
+
+class JobStore:
+    """
+    SQLite-backed record of jobs: status, current stage, progress and result.
+    Each call opens its own connection so the store can be shared across threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def fail_interrupted(self):
+        """
+        Mark jobs left queued or running by a previous server process as failed, since
+        they can't resume. Only the server that owns the queue may call this, at startup.
+        Returns the number of jobs marked.
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+                (FAILED, "Interrupted by server restart", time.time(), QUEUED, RUNNING),
+            ).rowcount
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, QUEUED, now, now),
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def mark_running(self, job_id):
+        """
+        Move a queued job to running. Returns False if it was cancelled while queued.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), job_id, QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def request_cancel(self, job_id):
+        """
+        Flag a job for cancellation. Queued jobs are cancelled immediately,
+        running jobs stop at their next stage boundary.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (now, job_id, QUEUED, RUNNING),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, CANCELLED, now, job_id, QUEUED),
+            )
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+
+class JobEvents:
+    """
+    In-memory log of the events each job publishes while it runs, for streaming
+    partial results to clients. Subscribers get every event from the start of the
+    job, then new ones as they arrive, until the job finishes. Logs of the last
+    `max_finished` finished jobs are kept so late subscribers can still replay them.
+    """
+
+    def __init__(self, max_finished=100):
+        self.max_finished = max_finished
+        self._logs = OrderedDict()  # job_id -> {"events": [(event, data)], "finished": bool}
+        self._condition = threading.Condition()
+
+    def open(self, job_id):
+        with self._condition:
+            self._logs[job_id] = {"events": [], "finished": False}
+
+    def has(self, job_id):
+        with self._condition:
+            return job_id in self._logs
+
+    def publish(self, job_id, event, data=None):
+        with self._condition:
+            log = self._logs.get(job_id)
+            if log is None or log["finished"]:
+                return
+            log["events"].append((event, data))
+            self._condition.notify_all()
+
+    def finish(self, job_id):
+        with self._condition:
+            log = self._logs.get(job_id)
+            if log is None:
+                return
+            log["finished"] = True
+            self._logs.move_to_end(job_id)
+            finished = [key for key, value in self._logs.items() if value["finished"]]
+            for key in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._logs[key]
+            self._condition.notify_all()
+
+    def subscribe(self, job_id, heartbeat=15.0):
+        """
+        Yield (event, data) for the job, replaying earlier events first. Yields None
+        after `heartbeat` seconds without events so callers can keep the connection
+        alive. Ends once the job has finished and every event has been delivered.
+        """
+        index = 0
+        while True:
+            with self._condition:
+                log = self._logs.get(job_id)
+                if log is None:
+                    return
+                if index >= len(log["events"]) and not log["finished"]:
+                    self._condition.wait(heartbeat)
+                events = log["events"][index:]
+                finished = log["finished"]
+            index += len(events)
+            if not events and not finished:
+                yield None
+            yield from events
+            if finished and index >= len(log["events"]):
+                return
+
+
+class JobContext:
+    """
+    Handle given to a running job for reporting progress and checking for cancellation.
+    Stage changes and anything passed to emit() are published to the job's event stream.
+    """
+
+    def __init__(self, store, job_id, events=None):
+        self.store = store
+        self.job_id = job_id
+        self.events = events
+
+    def emit(self, event, data=None):
+        if self.events:
+            self.events.publish(self.job_id, event, data)
+
+    def set_stage(self, stage, progress=None):
+        self.check_cancelled()
+        fields = {"stage": stage}
+        if progress is not None:
+            fields["progress"] = round(progress, 4)
+        self.store.update(self.job_id, **fields)
+        self.emit("stage", fields)
+
+    def set_progress(self, progress):
+        self.store.update(self.job_id, progress=round(progress, 4))
+
+    def check_cancelled(self):
+        if self.store.is_cancel_requested(self.job_id):
+            raise JobCancelled()
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a fixed pool of worker threads.
+    `handler(ctx, **payload)` runs each job and returns its JSON-serializable result.
+    The handler is called even for jobs cancelled while queued, so it can clean up
+    its inputs; ctx.check_cancelled() raises straight away in that case.
+    With `events`, each job's stream ends with a "result", "error" or "cancelled" event.
+    """
+
+    def __init__(self, store, handler, max_workers=1, max_queue_depth=10, events=None):
+        self.store = store
+        self.handler = handler
+        self.events = events
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def depth(self):
+        with self._lock:
+            return self._pending
+
+    def submit(self, **payload):
+        with self._lock:
+            if self._pending >= self.max_queue_depth:
+                raise QueueFull(f"Job queue is full ({self.max_queue_depth} jobs pending)")
+            self._pending += 1
+        try:
+            job_id = self.store.create()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        if self.events:
+            self.events.open(job_id)
+        self._queue.put((job_id, payload))
+        logger.info(f"Queued job {job_id} ({self.depth()} pending)")
+        return job_id
+
+    def cancel(self, job_id):
+        return self.store.request_cancel(job_id)
+
+    def _worker(self):
+        while True:
+            job_id, payload = self._queue.get()
+            ctx = JobContext(self.store, job_id, self.events)
+            try:
+                self.store.mark_running(job_id)
+                result = self.handler(ctx, **payload)
+                self.store.update(job_id, status=SUCCEEDED, stage="done", progress=1.0, result=result)
+                ctx.emit("result", result)
+                logger.info(f"Job {job_id} succeeded")
+            except JobCancelled:
+                self.store.update(job_id, status=CANCELLED, stage=CANCELLED)
+                ctx.emit("cancelled")
+                logger.info(f"Job {job_id} cancelled")
+            except Exception as e:
+                self.store.update(job_id, status=FAILED, error=str(e))
+                ctx.emit("error", {"error": str(e)})
+                logger.error(f"Job {job_id} failed: {str(e)}")
+            finally:
+                if self.events:
+                    self.events.finish(job_id)
+                with self._lock:
+                    self._pending -= 1
+                self._queue.task_done()
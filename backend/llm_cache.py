@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from transcript_cache import TranscriptCache
+
+
+def normalize_messages(messages):
+    """
+    Chat messages with indentation and trailing whitespace stripped from every line,
+    so prompts built from indented triple-quoted strings hash the same however they
+    are laid out in the source.
+    """
+    return [
+        {"role": message["role"], "content": "\n".join(line.strip() for line in message["content"].strip().splitlines())}
+        for message in messages
+    ]
+
+
+def llm_cache_key(provider, model, messages, max_tokens, temperature):
+    """
+    Hash of the provider, model, normalized messages and sampling parameters.
+    """
+    payload = [provider, model, normalize_messages(messages), max_tokens, temperature]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class MemoryResponseCache:
+    """
+    In-process LLM response cache: LRU over at most `max_entries`, entries expire after `ttl` seconds.
+    Any object with the same get/put/purge/stats methods can be given to LLMClient.
+    """
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created_at"] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge(self):
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+            }
+
+
+class DiskResponseCache(TranscriptCache):
+    """
+    Persistent LLM response cache: one JSON file per response, evicted least recently
+    used first once the directory exceeds `max_bytes`, and expired after `ttl` seconds.
+    """
+
+    def __init__(self, directory, max_bytes, ttl=24 * 3600):
+        super().__init__(directory, max_bytes)
+        self.ttl = ttl
+        self.expired = 0
+
+    def get(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            if time.time() - entry.get("created_at", 0) > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                self.expired += 1
+                self.misses += 1
+                return None
+            os.utime(path)  # Mark as recently used
+            self.hits += 1
+            return entry
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({"backend": "disk", "ttl_seconds": self.ttl, "expired": self.expired})
+        return stats
+
+
+def response_cache_from_env():
+    """
+    Build the LLM response cache from LLM_CACHE ("disk", the default, "memory" or "off"),
+    LLM_CACHE_DIR, LLM_CACHE_MAX_MB and LLM_CACHE_TTL_HOURS. Returns None when off.
+    """
+    backend = os.getenv("LLM_CACHE", "disk").strip().lower()
+    ttl = float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return MemoryResponseCache(ttl=ttl)
+    if backend != "disk":
+        raise ValueError(f"Unknown LLM_CACHE '{backend}', expected 'disk', 'memory' or 'off'")
+    return DiskResponseCache(
+        os.getenv("LLM_CACHE_DIR", "temp/llm_cache"),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024,
+        ttl=ttl,
+    )
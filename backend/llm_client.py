@@ -0,0 +1,97 @@
+import os
+import time
+import logging
+
+from http_client import HTTPClientError, PooledHTTPClient
+from llm_cache import llm_cache_key
+from telemetry import span, LLM_REQUESTS, LLM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(HTTPClientError):
+    """Raised when a chat completion fails after all retries."""
+
+
+class LLMClient(PooledHTTPClient):
+    """
+    Shared client for one OpenAI-compatible chat completions provider.
+    Keeps a pooled keep-alive session, applies a timeout to every request, retries
+    429s and 5xx responses with jittered exponential backoff, and caps the number
+    of requests in flight to the provider.
+    With a response `cache` (see llm_cache), identical requests are answered from it.
+    """
+
+    error = LLMError
+
+    def __init__(self, name, base_url, api_key_env, timeout=60.0, max_retries=3, max_concurrency=4,
+                 backoff_base=0.5, backoff_max=20.0, cache=None):
+        super().__init__(name, timeout, max_retries, max_concurrency, backoff_base, backoff_max)
+        self.base_url = base_url.rstrip("/")
+        self.api_key_env = api_key_env  # Read per request, so keys can be set after import
+        self.cache = cache
+
+    @classmethod
+    def from_env(cls, name, prefix, default_base_url, api_key_env, cache=None):
+        """
+        Build a client configured by <PREFIX>_BASE_URL, falling back to the shared
+        LLM_TIMEOUT, LLM_MAX_RETRIES and LLM_MAX_CONCURRENCY settings, each of which
+        can be overridden per provider with the same <PREFIX>_ name.
+        """
+        def setting(key, default):
+            return os.getenv(f"{prefix}_{key}", os.getenv(f"LLM_{key}", default))
+
+        return cls(
+            name,
+            os.getenv(f"{prefix}_BASE_URL", default_base_url),
+            api_key_env,
+            timeout=float(setting("TIMEOUT", "60")),
+            max_retries=int(setting("MAX_RETRIES", "3")),
+            max_concurrency=int(setting("MAX_CONCURRENCY", "4")),
+            cache=cache,
+        )
+
+    def chat(self, model, messages, max_tokens=500, temperature=0.7, use_cache=True):
+        """
+        Run a chat completion and return the assistant message content.
+        `use_cache=False` skips the cache lookup; the fresh response still replaces the cached one.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = llm_cache_key(self.name, model, messages, max_tokens, temperature)
+            cached = self.cache.get(cache_key) if use_cache else None
+            if cached:
+                logger.info(f"{self.name} response cache hit for {cache_key[:12]}")
+                LLM_REQUESTS.inc(provider=self.name, outcome="cache_hit")
+                return cached["content"]
+
+        start = time.perf_counter()
+        try:
+            with span("llm", provider=self.name, model=model):
+                content = self._complete(model, messages, max_tokens, temperature)
+        except Exception:
+            LLM_REQUESTS.inc(provider=self.name, outcome="error")
+            raise
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - start, provider=self.name)
+        LLM_REQUESTS.inc(provider=self.name, outcome="ok")
+        if cache_key:
+            try:
+                self.cache.put(cache_key, {"content": content, "model": model, "created_at": time.time()})
+            except Exception as e:
+                logger.warning(f"Could not cache {self.name} response: {str(e)}")
+        return content
+
+    def _complete(self, model, messages, max_tokens, temperature):
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        api_key = os.getenv(self.api_key_env)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        url = f"{self.base_url}/chat/completions"
+
+        response = self.request("POST", url, json=payload, headers=headers)
+        return response.json()["choices"][0]["message"]["content"]
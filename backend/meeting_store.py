@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import time
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query matching every word, so user input is never
+    parsed as FTS syntax. Returns None if there is nothing to search for.
+    """
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"' for word in words) or None
+
+
+class MeetingStore:
+    """
+    SQLite record of processed meetings: the transcript as timed chunk segments,
+    the summary and the action items. Segments, summaries and action items are
+    indexed together in one FTS5 table, so search is a single ranked query.
+    The database runs in WAL mode so searches don't wait on a meeting being saved.
+    """
+
+    SEARCH_KINDS = ("transcript", "summary", "action_item")
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS meetings (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    model TEXT,
+                    duration_ms INTEGER,
+                    transcript TEXT NOT NULL,
+                    summary TEXT,
+                    action_items TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS meetings_created_at ON meetings (created_at);
+                CREATE TABLE IF NOT EXISTS segments (
+                    meeting_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    start_ms INTEGER,
+                    end_ms INTEGER,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (meeting_id, position)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    text,
+                    kind UNINDEXED,
+                    meeting_id UNINDEXED,
+                    position UNINDEXED,
+                    start_ms UNINDEXED,
+                    end_ms UNINDEXED,
+                    tokenize = 'porter unicode61'
+                );
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def save(self, meeting_id, transcript, segments, summary="", action_items=(), filename="", model=""):
+        """
+        Store (or replace) a meeting. `segments` are {"text", "start_ms", "end_ms"} dicts in order.
+        """
+        action_items = [item for item in action_items if isinstance(item, dict) and item.get("task")]
+        # Unknown (None) for segments without times, e.g. from old transcript cache entries
+        duration_ms = max((segment["end_ms"] for segment in segments if segment.get("end_ms") is not None), default=None)
+        with self._connect() as conn:
+            self._delete(conn, meeting_id)
+            conn.execute(
+                "INSERT INTO meetings (id, filename, model, duration_ms, transcript, summary, action_items, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (meeting_id, filename, model, duration_ms, transcript, summary, json.dumps(action_items), time.time()),
+            )
+            rows = [
+                (meeting_id, position, segment.get("start_ms"), segment.get("end_ms"), segment["text"].strip())
+                for position, segment in enumerate(segments)
+                if segment["text"].strip()
+            ]
+            conn.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO search_index (text, kind, meeting_id, position, start_ms, end_ms) VALUES (?, 'transcript', ?, ?, ?, ?)",
+                [(text, meeting_id, position, start_ms, end_ms) for meeting_id, position, start_ms, end_ms, text in rows],
+            )
+            if summary:
+                conn.execute(
+                    "INSERT INTO search_index (text, kind, meeting_id) VALUES (?, 'summary', ?)", (summary, meeting_id)
+                )
+            conn.executemany(
+                "INSERT INTO search_index (text, kind, meeting_id, position) VALUES (?, 'action_item', ?, ?)",
+                [
+                    (f"{item['task']} {item.get('assignee', '')} {item.get('deadline', '')}", meeting_id, position)
+                    for position, item in enumerate(action_items)
+                ],
+            )
+
+    def _delete(self, conn, meeting_id):
+        conn.execute("DELETE FROM search_index WHERE meeting_id = ?", (meeting_id,))
+        conn.execute("DELETE FROM segments WHERE meeting_id = ?", (meeting_id,))
+        return conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,)).rowcount
+
+    def delete(self, meeting_id):
+        with self._connect() as conn:
+            return self._delete(conn, meeting_id) > 0
+
+    def get(self, meeting_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return None
+            segments = conn.execute(
+                "SELECT start_ms, end_ms, text FROM segments WHERE meeting_id = ? ORDER BY position", (meeting_id,)
+            ).fetchall()
+        meeting = dict(row)
+        meeting["action_items"] = json.loads(meeting["action_items"] or "[]")
+        meeting["segments"] = [dict(segment) for segment in segments]
+        return meeting
+
+    def list(self, limit=50, offset=0):
+        """
+        Most recent meetings first, without their transcripts.
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT id, filename, model, duration_ms, summary, created_at FROM meetings "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+            total = conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+        return {"total": total, "meetings": [dict(row) for row in rows]}
+
+    def search(self, query, kinds=None, meeting_id=None, limit=20, offset=0):
+        """
+        Ranked (BM25) hits for `query` across every meeting, best first. Transcript hits
+        carry the chunk's offsets in the recording, in milliseconds.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        conditions = ["search_index MATCH ?"]
+        params = [match]
+        kinds = [kind for kind in (kinds or self.SEARCH_KINDS) if kind in self.SEARCH_KINDS]
+        if len(kinds) < len(self.SEARCH_KINDS):
+            conditions.append(f"s.kind IN ({', '.join('?' for _ in kinds) or 'NULL'})")
+            params += kinds
+        if meeting_id:
+            conditions.append("s.meeting_id = ?")
+            params.append(meeting_id)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"""
+                SELECT s.meeting_id, s.kind, s.position, s.start_ms, s.end_ms, s.text,
+                       snippet(search_index, 0, '[', ']', '...', 16) AS snippet,
+                       s.rank AS score, m.filename, m.created_at
+                FROM search_index AS s JOIN meetings AS m ON m.id = s.meeting_id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY s.rank LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset),
+            ).fetchall()
+        hits = []
+        for row in rows:
+            hit = dict(row)
+            hit["score"] = round(-hit["score"], 4)  # rank (BM25) is lower-is-better; report higher-is-better
+            hits.append(hit)
+        return hits
@@ -0,0 +1,164 @@
+from collections import namedtuple
+import numpy as np
+
+from audio_ingest import SAMPLE_RATE
+
+# Energy-based voice activity detection, in 30 ms frames
+FRAME_SECONDS = 0.03
+# Whisper's encoder always sees 30 s, so pack speech into windows up to that long
+MAX_WINDOW_SECONDS = 30.0
+
+# A window of speech to decode: its audio and the (start, end) sample spans
+# in the original recording that were concatenated to make it
+SpeechWindow = namedtuple("SpeechWindow", ["audio", "spans"])
+
+
+def frame_energy_db(frame):
+    return 10 * np.log10(np.mean(np.square(frame, dtype=np.float64)) + 1e-10)
+
+
+def iter_speech_windows(
+    blocks,
+    sr=SAMPLE_RATE,
+    max_window=MAX_WINDOW_SECONDS,
+    min_silence=0.3,
+    min_speech=0.25,
+    padding=0.1,
+    threshold_db=12.0,
+    floor_db=-50.0,
+):
+    """
+    Yield SpeechWindows of at most `max_window` seconds from an iterable of PCM blocks.
+
+    A frame counts as speech when its energy is `threshold_db` above a running noise
+    floor estimate and above `floor_db` dBFS. Speech regions end after `min_silence`
+    seconds of non-speech, are padded by `padding` seconds on each side, and regions
+    shorter than `min_speech` are dropped as clicks. Regions are packed whole into
+    windows, so cuts fall in pauses; a region longer than a window is cut at its
+    quietest frame in the last few seconds. Windows never overlap.
+    Memory is bounded by about two windows of audio whatever the input length.
+    """
+    frame_samples = int(sr * FRAME_SECONDS)
+    pad_samples = int(sr * padding)
+    max_samples = int(sr * max_window)
+    max_region_samples = max_samples - 2 * pad_samples
+    silence_frames_to_close = max(1, int(min_silence / FRAME_SECONDS))
+    min_speech_frames = max(1, int(min_speech / FRAME_SECONDS))
+    cut_search_frames = int(5.0 / FRAME_SECONDS)
+
+    # Recent audio, starting at sample offset `buffer_start` of the recording
+    buffer = np.empty(0, dtype=np.float32)
+    buffer_start = 0
+    position = 0  # Offset of the next unprocessed frame
+
+    noise_floor = floor_db - threshold_db
+    region_start = None  # Offset of the first speech frame of the open region
+    audio_start = None  # Where the open region's audio starts, including padding
+    region_energies = []  # Per-frame energies since region_start
+    speech_frames = 0
+    last_speech_end = None
+    silence_run = 0
+
+    window_audio = []
+    window_spans = []
+    window_samples = 0
+
+    def extract(start, end):
+        start = max(start, buffer_start)
+        return buffer[start - buffer_start:end - buffer_start].copy(), (start, end)
+
+    def add_region(audio, span):
+        nonlocal window_audio, window_spans, window_samples
+        completed = None
+        if window_audio and window_samples + len(audio) > max_samples:
+            completed = SpeechWindow(np.concatenate(window_audio), window_spans)
+            window_audio, window_spans, window_samples = [], [], 0
+        window_audio.append(audio)
+        window_spans.append(span)
+        window_samples += len(audio)
+        return completed
+
+    def close_region(end):
+        nonlocal region_start, audio_start, region_energies, speech_frames, last_speech_end, silence_run
+        completed = None
+        if speech_frames >= min_speech_frames:
+            audio, span = extract(audio_start, min(end, buffer_start + len(buffer)))
+            completed = add_region(audio, span)
+        region_start, audio_start, region_energies, speech_frames, last_speech_end, silence_run = None, None, [], 0, None, 0
+        return completed
+
+    def process():
+        nonlocal buffer, buffer_start, position, noise_floor
+        nonlocal region_start, audio_start, region_energies, speech_frames, last_speech_end, silence_run
+        while position + frame_samples <= buffer_start + len(buffer):
+            offset = position - buffer_start
+            energy = frame_energy_db(buffer[offset:offset + frame_samples])
+
+            # Noise floor follows quiet frames quickly and loud frames slowly
+            if energy < noise_floor:
+                noise_floor = energy
+            else:
+                noise_floor += 0.005 * (energy - noise_floor)
+            is_speech = energy > max(floor_db, noise_floor + threshold_db)
+
+            if is_speech:
+                if region_start is None:
+                    region_start = position
+                    audio_start = position - pad_samples
+                speech_frames += 1
+                last_speech_end = position + frame_samples
+                silence_run = 0
+            elif region_start is not None:
+                silence_run += 1
+            if region_start is not None:
+                region_energies.append(energy)
+            position += frame_samples
+
+            if region_start is not None and silence_run >= silence_frames_to_close:
+                completed = close_region(last_speech_end + pad_samples)
+                if completed:
+                    yield completed
+            elif region_start is not None and position - region_start >= max_region_samples:
+                # Too long to fit a window: cut at the quietest recent frame
+                search = region_energies[-cut_search_frames:]
+                quietest = len(region_energies) - len(search) + int(np.argmin(search))
+                cut = region_start + (quietest + 1) * frame_samples
+                remaining_energies = region_energies[quietest + 1:]
+                completed = close_region(cut)
+                if completed:
+                    yield completed
+                if cut < position:
+                    # Carry on with the rest of the region; its audio starts exactly
+                    # at the cut so nothing is decoded twice
+                    region_start = cut
+                    audio_start = cut
+                    region_energies = remaining_energies
+                    speech_frames = min_speech_frames
+                    last_speech_end = position
+
+        # Drop audio nothing can refer to any more
+        keep_from = position - pad_samples
+        if audio_start is not None:
+            keep_from = min(keep_from, audio_start)
+        if keep_from > buffer_start:
+            buffer = buffer[keep_from - buffer_start:].copy()
+            buffer_start = keep_from
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        yield from process()
+
+    if region_start is not None:
+        completed = close_region(last_speech_end + pad_samples)
+        if completed:
+            yield completed
+    if window_audio:
+        yield SpeechWindow(np.concatenate(window_audio), window_spans)
+
+
+def iter_array_blocks(audio, block_samples=SAMPLE_RATE * 10):
+    """
+    Present an in-memory PCM array as blocks for iter_speech_windows.
+    """
+    for i in range(0, len(audio), block_samples):
+        yield audio[i:i + block_samples]
@@ -0,0 +1,386 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from audio_ingest import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Whisper's feature extractor truncates input to 30s, so no decode covers more
+DECODE_WINDOW_SAMPLES = 30 * SAMPLE_RATE
+# A span that fails to decode this many times in a row is dropped, so a bad
+# decoder can't spin, and a closed session still gets flushed and removed
+MAX_DECODE_ATTEMPTS = 3
+DECODE_RETRY_BASE = 0.5  # seconds, doubled per failed attempt
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity circular buffer of PCM samples addressed by absolute sample offset.
+    `start` is the oldest retained offset and `end` is one past the newest sample.
+    """
+
+    def __init__(self, capacity_samples):
+        self._data = np.zeros(capacity_samples, dtype=np.float32)
+        self.capacity = capacity_samples
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, samples):
+        """
+        Append samples, dropping the oldest ones if the buffer overflows.
+        Returns the number of samples dropped.
+        """
+        total = len(samples)
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        index = (self.end + total - n) % self.capacity
+        first = min(n, self.capacity - index)
+        self._data[index:index + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self.end += total
+        dropped = max(0, len(self) - self.capacity)
+        self.start += dropped
+        return dropped
+
+    def read(self, from_offset=None, to_offset=None):
+        """
+        Copy out the samples from `from_offset` (default: the oldest) to `to_offset`
+        (default: the end).
+        """
+        from_offset = self.start if from_offset is None else max(from_offset, self.start)
+        to_offset = self.end if to_offset is None else min(to_offset, self.end)
+        n = max(0, to_offset - from_offset)
+        index = from_offset % self.capacity
+        first = min(n, self.capacity - index)
+        return np.concatenate([self._data[index:index + first], self._data[:n - first]])
+
+    def discard_until(self, offset):
+        self.start = min(max(self.start, offset), self.end)
+
+
+def _normalize(text):
+    return re.sub(r"[^\w\s]", "", text.lower()).strip()
+
+
+class StreamingSession:
+    """
+    Live transcription state for one client.
+
+    Audio accumulates in a ring buffer. Every `step_seconds` of new audio the
+    uncommitted part is decoded into timestamped segments. A segment is committed
+    once two consecutive decodes agree on it and a later segment follows it; the
+    buffer is then trimmed to the end of the committed text. Everything after the
+    last commit is reported as tentative and may still change.
+    """
+
+    def __init__(self, session_id, step_seconds=2.0, max_buffer_seconds=25.0, capacity_seconds=60.0):
+        self.session_id = session_id
+        self.step_samples = int(step_seconds * SAMPLE_RATE)
+        self.max_buffer_samples = int(max_buffer_seconds * SAMPLE_RATE)
+        self.buffer = AudioRingBuffer(int(capacity_seconds * SAMPLE_RATE))
+        self.lock = threading.RLock()
+
+        self.committed = []  # Committed segment texts, in order
+        self.tentative = ""
+        self.previous_segments = []  # Last decode's segments, for agreement
+        self.decoded_until = 0  # Buffer end offset at the last decode
+        self.decoding = False
+        self.decode_failures = 0  # Consecutive failed decodes
+        self.retry_at = 0.0  # No decode before this time after a failure
+        self.closed = False
+
+        # (end_offset, arrival_time) per received chunk, for latency measurement
+        self.arrivals = deque()
+
+        self.summary = ""
+        self.summarized_segments = 0
+        self.summarizing = False
+        self.last_summary_at = 0.0
+
+    def add_audio(self, samples, arrival_time):
+        with self.lock:
+            dropped = self.buffer.append(samples)
+            self.arrivals.append((self.buffer.end, arrival_time))
+        if dropped:
+            logger.warning(f"Session {self.session_id}: decoding fell behind, dropped {dropped} samples")
+
+    def arrival_time(self, offset):
+        """
+        When the chunk holding sample `offset` arrived.
+        """
+        for end, arrived in self.arrivals:
+            if end >= offset:
+                return arrived
+        return self.arrivals[-1][1] if self.arrivals else time.time()
+
+    def ready_to_decode(self, final=False):
+        pending = self.buffer.end - self.decoded_until
+        return (
+            not self.decoding
+            and len(self.buffer) > 0
+            and time.time() >= self.retry_at
+            and (final or pending >= self.step_samples)
+        )
+
+    def apply_decode(self, segments, buffer_start, buffer_end, final=False):
+        """
+        Update committed and tentative text from a decode of the samples
+        [buffer_start, buffer_end). `segments` are (text, start_sec, end_sec)
+        relative to buffer_start. Returns (newly_committed_segments, tentative_text);
+        each new segment is (text, end_offset).
+        """
+        newly_committed = []
+        with self.lock:
+            segments = [s for s in segments if s[0].strip()]
+            force = final or buffer_end - buffer_start >= self.max_buffer_samples
+
+            commit_count = 0
+            for i, segment in enumerate(segments[:-1]):
+                agreed = i < len(self.previous_segments) and _normalize(segment[0]) == _normalize(self.previous_segments[i][0])
+                if not (agreed or force):
+                    break
+                commit_count = i + 1
+            if final or (force and commit_count == 0 and segments):
+                # Nothing settled before the buffer filled up: take everything decoded
+                commit_count = len(segments)
+
+            trim_offset = buffer_start
+            for text, _, end in segments[:commit_count]:
+                end_offset = min(buffer_start + int(end * SAMPLE_RATE), buffer_end)
+                newly_committed.append((text.strip(), end_offset))
+                self.committed.append(text.strip())
+                trim_offset = end_offset
+            if commit_count == len(segments) and (commit_count or force):
+                # Everything decoded is committed (or was silence): drop the whole decoded span
+                trim_offset = buffer_end
+
+            self.buffer.discard_until(trim_offset)
+            while self.arrivals and self.arrivals[0][0] <= self.buffer.start:
+                self.arrivals.popleft()
+
+            remaining = segments[commit_count:]
+            self.previous_segments = remaining
+            self.tentative = " ".join(text.strip() for text, _, _ in remaining)
+            self.decoded_until = buffer_end
+            return newly_committed, self.tentative
+
+    def decode_failed(self, buffer_end):
+        """
+        Record a failed decode of the span ending at `buffer_end`. Live audio waits for
+        the next step; after MAX_DECODE_ATTEMPTS failures in a row the span is dropped.
+        """
+        with self.lock:
+            self.decode_failures += 1
+            self.decoded_until = max(self.decoded_until, buffer_end)
+            delay = DECODE_RETRY_BASE * 2 ** (self.decode_failures - 1)
+            if self.decode_failures >= MAX_DECODE_ATTEMPTS:
+                dropped = buffer_end - self.buffer.start
+                self.buffer.discard_until(buffer_end)
+                while self.arrivals and self.arrivals[0][0] <= self.buffer.start:
+                    self.arrivals.popleft()
+                self.decode_failures = 0
+                delay = 0.0
+                logger.warning(f"Session {self.session_id}: dropped {dropped} samples that failed to decode")
+            self.retry_at = time.time() + delay
+
+    def committed_text(self):
+        return " ".join(self.committed)
+
+
+class LatencyStats:
+    """
+    Rolling end-to-end latency samples: from the arrival of the audio that
+    completed a segment to the moment that segment was emitted.
+    """
+
+    def __init__(self, max_samples=1000):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.segments = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.segments += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            segments = self.segments
+        if not samples:
+            return {"segments": segments, "p50_ms": None, "p95_ms": None, "max_ms": None}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1)
+
+        return {
+            "segments": segments,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+
+
+class StreamingEngine:
+    """
+    Runs live transcription for many sessions at once.
+
+    `decode(audio)` returns a list of (text, start_sec, end_sec) segments and runs
+    on a worker pool, never on the Socket.IO handler. `summarize(previous, new_text)`
+    returns an updated rolling summary; summaries are debounced to at most one per
+    `summary_interval` seconds per session and coalesce all text committed since the
+    last one. `emit(session_id, event, payload)` delivers results to the client.
+    """
+
+    def __init__(self, decode, summarize, emit, workers=2, summary_workers=2,
+                 step_seconds=2.0, max_buffer_seconds=25.0, summary_interval=30.0):
+        self.decode = decode
+        self.summarize = summarize
+        self.emit = emit
+        self.step_seconds = step_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.summary_interval = summary_interval
+        self.sessions = {}
+        self.latency = LatencyStats()
+        self._lock = threading.Lock()
+        self._decode_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stream-decode")
+        self._summary_pool = ThreadPoolExecutor(max_workers=summary_workers, thread_name_prefix="stream-summary")
+
+    def open_session(self, session_id):
+        with self._lock:
+            session = StreamingSession(session_id, self.step_seconds, self.max_buffer_seconds)
+            self.sessions[session_id] = session
+        return session
+
+    def close_session(self, session_id):
+        """
+        Flush the session: decode and commit whatever audio is left, then summarize.
+        """
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if session:
+            session.closed = True
+            self._schedule_decode(session, final=True)
+
+    def add_audio(self, session_id, samples):
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            session = self.open_session(session_id)
+        session.add_audio(samples, time.time())
+        self._schedule_decode(session)
+
+    def _schedule_decode(self, session, final=False):
+        with session.lock:
+            if not session.ready_to_decode(final):
+                wait = session.retry_at - time.time()
+                if final and not session.decoding and len(session.buffer) and wait > 0:
+                    # Backing off after a failed decode; flush once that's over
+                    threading.Timer(wait, self._schedule_decode, (session, True)).start()
+                elif final and not session.decoding:
+                    self._finish_session(session)
+                return
+            session.decoding = True
+        self._decode_pool.submit(self._run_decode, session, final)
+
+    def _run_decode(self, session, final):
+        try:
+            with session.lock:
+                # Decode at most one Whisper window; anything after it stays buffered for the next pass
+                buffer_start = session.buffer.start
+                buffer_end = min(session.buffer.end, buffer_start + DECODE_WINDOW_SAMPLES)
+                last_window = buffer_end == session.buffer.end
+                audio = session.buffer.read(buffer_start, buffer_end)
+            try:
+                segments = self.decode(audio)
+            except Exception as e:
+                session.decode_failed(buffer_end)
+                logger.error(f"Session {session.session_id}: decode failed: {str(e)}")
+                return
+            session.decode_failures = 0
+            new_segments, tentative = session.apply_decode(
+                segments, buffer_start, buffer_end, final=final and last_window
+            )
+
+            now = time.time()
+            for text, end_offset in new_segments:
+                latency = now - session.arrival_time(end_offset)
+                self.latency.record(latency)
+                self.emit(session.session_id, "transcription", {
+                    "text": text,
+                    "committed": True,
+                    "latency_ms": round(latency * 1000, 1),
+                })
+            if tentative:
+                self.emit(session.session_id, "transcription", {"text": tentative, "committed": False})
+            if new_segments:
+                self._schedule_summary(session)
+        except Exception as e:
+            logger.error(f"Session {session.session_id}: decode failed: {str(e)}")
+        finally:
+            with session.lock:
+                session.decoding = False
+            if session.closed:
+                # Keep flushing until everything is committed. After a failure this waits
+                # out the back-off, and repeated failures drop spans, so it always ends
+                self._schedule_decode(session, final=True)
+            elif session.ready_to_decode():
+                # Audio that arrived during the decode (or after a failure's back-off)
+                # is handled in one coalesced pass
+                self._schedule_decode(session)
+
+    def _schedule_summary(self, session, force=False):
+        with session.lock:
+            due = force or time.time() - session.last_summary_at >= self.summary_interval
+            if session.summarizing or not due or session.summarized_segments >= len(session.committed):
+                return
+            session.summarizing = True
+        self._summary_pool.submit(self._run_summary, session, force)
+
+    def _run_summary(self, session, force):
+        try:
+            with session.lock:
+                new_text = " ".join(session.committed[session.summarized_segments:])
+                summarized_until = len(session.committed)
+                previous = session.summary
+            summary = self.summarize(previous, new_text)
+            with session.lock:
+                session.summary = summary
+                session.summarized_segments = summarized_until
+                session.last_summary_at = time.time()
+            self.emit(session.session_id, "summary", summary)
+        except Exception as e:
+            logger.error(f"Session {session.session_id}: summary failed: {str(e)}")
+        finally:
+            with session.lock:
+                session.summarizing = False
+            if session.closed:
+                self._finish_session(session)
+
+    def _finish_session(self, session):
+        """
+        Final summary for a closed session once decoding is done, then forget it.
+        """
+        with session.lock:
+            pending = session.summarized_segments < len(session.committed)
+            busy = session.summarizing
+        if busy:
+            return  # _run_summary calls back here when it finishes
+        if pending:
+            self._schedule_summary(session, force=True)
+            return
+        with self._lock:
+            self.sessions.pop(session.session_id, None)
+
+    def stats(self):
+        with self._lock:
+            active = len(self.sessions)
+        return {"active_sessions": active, "latency": self.latency.snapshot()}
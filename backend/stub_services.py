@@ -0,0 +1,166 @@
+"""
+Local stand-ins for the remote services the backend calls, for benchmarks and
+local runs without API keys. Each server runs in a background thread:
+
+    with StubLLMServer(latency=0.5, rate_limit_every=4) as llm:
+        os.environ["HUGGINGFACE_BASE_URL"] = llm.url
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STUB_SUMMARY = "- The team reviewed the release plan.\n- Testing starts next week."
+STUB_ACTION_ITEMS = (
+    "- Task: Finalize the release checklist\n- Assignee: Priya\n- Deadline: Friday\n\n"
+    "- Task: Book the QA environment\n- Assignee: Arun\n- Deadline: Monday"
+)
+
+
+class StubServer:
+    """
+    Base for a stub HTTP server on an ephemeral localhost port.
+    Subclasses implement handle(method, path, body) -> (status, headers, payload).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+
+            def _dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests += 1
+                    count = stub.requests
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, headers, payload = stub.handle(method, self.path, body, count)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, method, path, body, count):
+        raise NotImplementedError
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubLLMServer(StubServer):
+    """
+    OpenAI-compatible /chat/completions endpoint with simulated latency.
+    Every `rate_limit_every`-th request gets a 429 with a short Retry-After.
+    """
+
+    def __init__(self, latency=0.0, rate_limit_every=0, retry_after=0.1):
+        super().__init__(latency)
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.rate_limited = 0
+
+    def reply_for(self, messages):
+        prompt = messages[-1]["content"] if messages else ""
+        if "**Summary:**" in prompt:
+            return f"**Summary:**\n{STUB_SUMMARY}\n\n**Action Items:**\n{STUB_ACTION_ITEMS}"
+        if "action items" in prompt.lower() and "Task:" in prompt:
+            return STUB_ACTION_ITEMS
+        return STUB_SUMMARY
+
+    def handle(self, method, path, body, count):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, {}, {"error": {"message": "Not found"}}
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            with self._lock:
+                self.rate_limited += 1
+            return 429, {"Retry-After": str(self.retry_after)}, {"error": {"message": "Rate limited"}}
+
+        request = json.loads(body or b"{}")
+        content = self.reply_for(request.get("messages", []))
+        return 200, {}, {
+            "id": f"stub-{count}",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())},
+        }
+
+
+class StubTrelloServer(StubServer):
+    """
+    The parts of the Trello REST API the backend uses: POST /1/cards and
+    GET /1/lists/<id>/cards. Cards are kept in memory. Every `rate_limit_every`-th
+    request gets a 429, like Trello's per-token rate limit.
+    """
+
+    def __init__(self, latency=0.0, rate_limit_every=0):
+        super().__init__(latency)
+        self.rate_limit_every = rate_limit_every
+        self.rate_limited = 0
+        self.cards = []
+
+    @property
+    def api_url(self):
+        return f"{self.url}/1"
+
+    def handle(self, method, path, body, count):
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            with self._lock:
+                self.rate_limited += 1
+            return 429, {}, {"message": "API_TOKEN_LIMIT_EXCEEDED"}
+
+        url = urlsplit(path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        if method == "POST" and parts == ["1", "cards"]:
+            card = {
+                "id": uuid.uuid4().hex[:24],
+                "idList": query.get("idList"),
+                "name": query.get("name", ""),
+                "desc": query.get("desc", ""),
+            }
+            with self._lock:
+                self.cards.append(card)
+            return 200, {}, card
+        if method == "GET" and len(parts) == 4 and parts[:2] == ["1", "lists"] and parts[3] == "cards":
+            with self._lock:
+                cards = [card for card in self.cards if card["idList"] == parts[2]]
+            return 200, {}, cards
+        return 404, {}, {"message": "Not found"}
@@ -0,0 +1,196 @@
+"""
+Per-stage timing spans, Prometheus metrics and an on-demand sampling profiler.
+
+    with request_context(request_id):
+        with span("transcribe"):
+            ...
+
+Every span is logged as one JSON line tagged with the current request id, and
+feeds the stage duration histogram (and the error counter if the stage raises).
+render_metrics() returns all metrics in the Prometheus text format for /metrics.
+"""
+import collections
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger("telemetry")
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("pipeline_stage_seconds", "Wall time per pipeline stage.", ["stage"])
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Stages that raised, by stage.", ["stage"])
+AUDIO_SECONDS = Counter("audio_seconds_processed_total", "Seconds of audio transcribed.")
+CHUNKS_DECODED = Counter("whisper_chunks_decoded_total", "Audio chunks decoded by Whisper.")
+TOKENS_GENERATED = Counter("whisper_tokens_generated_total", "Tokens generated by Whisper.")
+LLM_SECONDS = Histogram("llm_request_seconds", "LLM request latency, including retries.", ["provider"])
+LLM_REQUESTS = Counter("llm_requests_total", "LLM requests by provider and outcome.", ["provider", "outcome"])
+JOBS = Counter("jobs_total", "Finished jobs by status.", ["status"])
+
+METRICS = [STAGE_SECONDS, STAGE_ERRORS, AUDIO_SECONDS, CHUNKS_DECODED, TOKENS_GENERATED, LLM_SECONDS, LLM_REQUESTS, JOBS]
+
+
+def render_metrics():
+    """
+    Every metric in the Prometheus text exposition format.
+    """
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+@contextlib.contextmanager
+def request_context(request_id):
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+def bind_context(fn):
+    """
+    Wrap `fn` to run with the caller's request id, for work handed to thread pools.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+@contextlib.contextmanager
+def span(stage, **fields):
+    """
+    Time a pipeline stage. Logs {"request_id", "stage", "duration_ms", ...fields}
+    as JSON and records the duration; a raised exception is counted and re-raised.
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield fields
+    except BaseException as e:
+        error = f"{type(e).__name__}: {str(e)}"
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        record = {"request_id": current_request_id(), "stage": stage, "duration_ms": round(duration * 1000, 2), **fields}
+        if error:
+            record["error"] = error
+        logger.info(json.dumps(record, default=str))
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread every `interval` seconds and writes the counts as
+    collapsed stacks ("frame;frame;frame count" lines), which flamegraph.pl and
+    speedscope read. Only the profiled thread is sampled, not thread or process pools.
+    """
+
+    def __init__(self, thread_id=None, interval=0.01):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def audio_content_hash(audio):
+    """
+    SHA-256 of a decoded 16 kHz PCM array.
+    """
+    return hashlib.sha256(audio.tobytes()).hexdigest()
+
+
+def transcript_cache_key(audio_hash, model_name, segmentation, chunk_size, overlap, task):
+    """
+    Content-addressed key: hash of the decoded 16 kHz audio (see audio_content_hash)
+    plus every decode parameter that changes the transcript.
+    """
+    digest = hashlib.sha256()
+    digest.update(audio_hash.encode("utf-8"))
+    digest.update(json.dumps([model_name, segmentation, chunk_size, overlap, task]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    On-disk transcript cache with size-bounded LRU eviction.
+    Each entry is one JSON file; a file's mtime is bumped on every hit and the
+    least recently used files are evicted once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+                os.utime(path)  # Mark as recently used
+                self.hits += 1
+                return entry
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+    def put(self, key, entry):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+            except OSError:
+                pass
+
+    def purge(self):
+        """
+        Remove every entry. Returns the number of entries removed.
+        """
+        with self._lock:
+            removed = 0
+            for _, _, name in self._entries():
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+            return removed
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            return {
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
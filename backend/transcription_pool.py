@@ -0,0 +1,137 @@
+"""
+Multi-process Whisper decoding for a single long recording.
+
+One torch process stops scaling well before a many-core machine is busy, so
+TranscriptionPool runs `workers` processes, each with its own Whisper model and
+`threads_per_worker` torch threads. Batches of chunks are handed out to the
+workers and their transcripts are yielded back in the original chunk order.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from telemetry import TOKENS_GENERATED
+
+logger = logging.getLogger(__name__)
+
+# The worker process's Whisper model, set by _init_worker
+_worker_state = None
+
+
+def _init_worker(model_name, profile_name, threads_per_worker, device):
+    global _worker_state
+    from whisper_runtime import load_whisper
+
+    # Fix the thread counts before torch starts any parallel work in this process
+    os.environ["WHISPER_INTRA_OP_THREADS"] = str(threads_per_worker)
+    os.environ["WHISPER_INTER_OP_THREADS"] = "1"
+    processor, model, _, profile = load_whisper(model_name, profile_name, device=device)
+    _worker_state = (processor, model, profile, device)
+
+
+def _decode_batch(batch, sr, task, generate_kwargs):
+    import torch
+    from whisper_runtime import grad_context
+
+    processor, model, profile, device = _worker_state
+    input_features = processor(batch, sampling_rate=sr, return_tensors="pt").input_features.to(device)
+    with grad_context(profile):
+        predicted_ids = model.generate(
+            input_features,
+            attention_mask=torch.ones_like(input_features),
+            task=task,
+            **generate_kwargs,
+        )
+    # The token count goes back with the text; metrics live in the parent process
+    tokens = int((predicted_ids != processor.tokenizer.pad_token_id).sum())
+    return processor.batch_decode(predicted_ids, skip_special_tokens=True), tokens
+
+
+def _ping():
+    return os.getpid()
+
+
+def resolve_pool_size(workers=None, threads_per_worker=None):
+    """
+    Resolve (workers, threads_per_worker) from the arguments, then TRANSCRIBE_WORKERS
+    and TRANSCRIBE_THREADS_PER_WORKER. Threads default to the CPUs split evenly
+    across the workers. One worker means the pool is off.
+    """
+    workers = int(workers or os.getenv("TRANSCRIBE_WORKERS") or 1)
+    threads_per_worker = threads_per_worker or os.getenv("TRANSCRIBE_THREADS_PER_WORKER")
+    if not threads_per_worker:
+        threads_per_worker = (os.cpu_count() or 1) // max(1, workers)
+    return max(1, workers), max(1, int(threads_per_worker))
+
+
+class TranscriptionPool:
+    """
+    Pool of Whisper worker processes. Workers load their model when the pool
+    starts; the pool is meant to be created once and reused for every recording.
+    """
+
+    def __init__(self, model_name, workers, threads_per_worker, profile_name=None, device="cpu"):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        # Spawned rather than forked: forking a process that already runs torch
+        # or server threads can deadlock the children
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, profile_name, threads_per_worker, device),
+        )
+        logger.info(f"Transcription pool: {workers} workers x {threads_per_worker} threads")
+
+    def decode_chunks(self, chunks, sr=16000, batch_size=1, task="translate", decode_profile=None):
+        """
+        Yield one transcript per chunk, in order. At most two batches per worker
+        are in flight, so a streamed recording is never held in memory whole.
+        `decode_profile` sets the decoding strategy; the model is fixed per pool.
+        """
+        from whisper_runtime import generate_kwargs, get_decode_profile
+
+        kwargs = generate_kwargs(get_decode_profile(decode_profile)[1])
+        chunks = iter(chunks)
+        in_flight = deque()
+        max_in_flight = 2 * self.workers
+        while True:
+            while len(in_flight) < max_in_flight:
+                batch = list(islice(chunks, batch_size))
+                if not batch:
+                    break
+                in_flight.append(self._executor.submit(_decode_batch, batch, sr, task, kwargs))
+            if not in_flight:
+                return
+            transcripts, tokens = in_flight.popleft().result()
+            TOKENS_GENERATED.inc(tokens)
+            yield from transcripts
+
+    def warm_up(self):
+        """
+        Start every worker and wait until each has loaded its model.
+        """
+        futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_transcription_pool(model_name, workers, threads_per_worker, profile_name=None, device="cpu"):
+    """
+    The shared pool for this configuration, started on first use.
+    """
+    key = (model_name, workers, threads_per_worker, profile_name, device)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = TranscriptionPool(model_name, workers, threads_per_worker, profile_name, device)
+        return _pools[key]
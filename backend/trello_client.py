@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import HTTPClientError, PooledHTTPClient
+
+logger = logging.getLogger(__name__)
+
+# Written into each card's description; the value is the card's idempotency key
+IDEMPOTENCY_MARKER = "Idempotency-Key:"
+
+
+class TrelloError(HTTPClientError):
+    """Raised when a Trello request fails after all retries."""
+
+
+def trello_idempotency_key(task, assignee, deadline):
+    """
+    Stable key for an action item: the same task, assignee and deadline (ignoring
+    case and whitespace) always map to the same card.
+    """
+    normalized = [re.sub(r"\s+", " ", str(value)).strip().lower() for value in (task, assignee, deadline)]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()[:16]
+
+
+class TrelloClient(PooledHTTPClient):
+    """
+    Creates Trello cards for action items over a pooled session, a few at a time,
+    backing off on Trello's 429 rate limiting. Each card carries an idempotency key
+    in its description; items whose key is already on the list, or was already
+    created by this process, are skipped instead of duplicated.
+    """
+
+    error = TrelloError
+
+    def __init__(self, base_url="https://api.trello.com/1", timeout=30.0, max_retries=3, max_concurrency=4):
+        super().__init__("trello", timeout, max_retries, max_concurrency)
+        self.base_url = base_url.rstrip("/")
+        self._created = {}  # idempotency key -> card id, or None while being created
+        self._created_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a client configured by TRELLO_BASE_URL, TRELLO_TIMEOUT, TRELLO_MAX_RETRIES
+        and TRELLO_MAX_CONCURRENCY. Credentials are read from TRELLO_API_KEY,
+        TRELLO_TOKEN and TRELLO_ID_LIST on every call.
+        """
+        return cls(
+            os.getenv("TRELLO_BASE_URL", "https://api.trello.com/1"),
+            timeout=float(os.getenv("TRELLO_TIMEOUT", "30")),
+            max_retries=int(os.getenv("TRELLO_MAX_RETRIES", "3")),
+            max_concurrency=int(os.getenv("TRELLO_MAX_CONCURRENCY", "4")),
+        )
+
+    def _auth(self):
+        return {"key": os.getenv("TRELLO_API_KEY"), "token": os.getenv("TRELLO_TOKEN")}
+
+    def existing_keys(self, list_id):
+        """
+        Idempotency keys of the cards already on the list, mapped to their card ids.
+        """
+        response = self.request(
+            "GET", f"{self.base_url}/lists/{list_id}/cards", params={**self._auth(), "fields": "id,desc"}
+        )
+        keys = {}
+        for card in response.json():
+            for line in (card.get("desc") or "").splitlines():
+                if line.startswith(IDEMPOTENCY_MARKER):
+                    keys[line[len(IDEMPOTENCY_MARKER):].strip()] = card.get("id")
+        return keys
+
+    def create_card(self, list_id, task, assignee, deadline, key):
+        def already_created():
+            # A timed-out or failed POST may have created the card anyway
+            card_id = self.existing_keys(list_id).get(key)
+            return {"id": card_id, "idempotency_key": key, "recovered": True} if card_id else None
+
+        response = self.request("POST", f"{self.base_url}/cards", before_retry=already_created, params={
+            **self._auth(),
+            "idList": list_id,
+            "name": task,
+            "desc": f"Assignee: {assignee}\nDeadline: {deadline}\n\n{IDEMPOTENCY_MARKER} {key}",
+        })
+        return response if isinstance(response, dict) else response.json()
+
+    def _reserve(self, key, existing):
+        """
+        Claim a key for creation. Returns the id of the card that already has it
+        (None if that card is still being created), or False if it is now ours.
+        """
+        with self._created_lock:
+            if key in existing:
+                return existing[key]
+            if key in self._created:
+                return self._created[key]
+            self._created[key] = None
+            return False
+
+    def _create(self, list_id, item, key):
+        try:
+            card = self.create_card(list_id, item["task"], item["assignee"], item["deadline"], key)
+            with self._created_lock:
+                self._created[key] = card.get("id")
+            return card
+        except Exception as e:
+            with self._created_lock:
+                self._created.pop(key, None)  # Let a later retry create it
+            return {"error": str(e), "idempotency_key": key}
+
+    def create_tasks(self, action_items):
+        """
+        Create a card per action item ({"task", "assignee", "deadline"}), concurrently.
+        Returns one response per item, in order: the created card, {"skipped": True, ...}
+        for a duplicate, or {"error": ...}.
+        """
+        list_id = os.getenv("TRELLO_ID_LIST")
+        try:
+            existing = self.existing_keys(list_id)
+        except Exception as e:
+            # Still safe against duplicates within this run and earlier runs of this process
+            logger.warning(f"Could not list existing Trello cards: {str(e)}")
+            existing = {}
+
+        results = [None] * len(action_items)
+        to_create = []
+        for index, item in enumerate(action_items):
+            key = trello_idempotency_key(item["task"], item["assignee"], item["deadline"])
+            card_id = self._reserve(key, existing)
+            if card_id is False:
+                to_create.append((index, item, key))
+            else:
+                results[index] = {"skipped": True, "reason": "duplicate", "id": card_id, "idempotency_key": key}
+        if len(to_create) < len(action_items):
+            logger.info(f"Skipping {len(action_items) - len(to_create)} duplicate Trello cards")
+
+        if to_create:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(to_create))) as pool:
+                futures = [(index, pool.submit(self._create, list_id, item, key)) for index, item, key in to_create]
+                for index, future in futures:
+                    results[index] = future.result()
+        return results
@@ -1,83 +1,333 @@
+import functools
 import os
-import librosa
-import requests
-import openai
-import torch
+import numpy as np
 import re
-from transformers import (
-    WhisperProcessor,
-    WhisperForConditionalGeneration,
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from itertools import islice
+from llm_client import LLMClient
+from llm_cache import response_cache_from_env
+from trello_client import TrelloClient
+from telemetry import span, bind_context, AUDIO_SECONDS, CHUNKS_DECODED, TOKENS_GENERATED
+from whisper_runtime import WhisperModels, generate_kwargs, get_decode_profile, grad_context, load_processor
+from audio_ingest import (
+    decode_audio,
+    iter_pcm_blocks,
+    hash_pcm_stream,
+    split_audio_into_chunks,
+    iter_audio_windows,
+    count_chunks,
+    SAMPLE_RATE,
 )
-from huggingface_hub import InferenceClient
+from segmentation import iter_speech_windows, iter_array_blocks, MAX_WINDOW_SECONDS
+from transcript_cache import TranscriptCache, audio_content_hash, transcript_cache_key
+from transcription_pool import get_transcription_pool, resolve_pool_size
+from jobs import JobCancelled
 
 # Set device to CPU (MPS has limitations)
 device = "cpu"
 print(f"Using device: {device}")
 
-# Load Whisper model for transcription
-processor = WhisperProcessor.from_pretrained("openai/whisper-small")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-small").to(device)
-whisper_model.config.use_cache = False  # Disable KV cache
-whisper_model.gradient_checkpointing_enable()  # Enable gradient checkpointing
-
-# Initialize Hugging Face Inference Client
-client = InferenceClient(
-    provider="sambanova",  # Replace with the correct provider if different
-    api_key=os.getenv("HUGGINGFACE_API_KEY")  # Set your Hugging Face API key in environment variables
+# Whisper models for transcription, configured by the WHISPER_PROFILE runtime profile.
+# Each decode profile names the model it uses; every model is loaded once, on first
+# use, and shared by all profiles and jobs that use it. `whisper` is the default
+# decode profile's model, loaded up front by whisper.start_warm_up().
+# With WHISPER_SERVICE_ADDRESS set, decoding goes to the shared inference service and
+# this process only loads the feature extractor and tokenizer.
+whisper_models = WhisperModels(device=device, service_address=os.getenv("WHISPER_SERVICE_ADDRESS"))
+WHISPER_MODEL_NAME = get_decode_profile()[1]["model"]
+whisper = whisper_models.get(WHISPER_MODEL_NAME)
+
+# Persistent transcript cache, so re-uploads of the same recording skip Whisper
+transcript_cache = TranscriptCache(
+    os.getenv("TRANSCRIPT_CACHE_DIR", "temp/transcript_cache"),
+    max_bytes=int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "200")) * 1024 * 1024,
 )
 
-def transcribe_audio(audio_file_path, chunk_size=20, overlap=5):
+# Shared, pooled LLM clients, one per provider. Llama-3.3-70B-Instruct is served through
+# the Hugging Face router by the provider named in HUGGINGFACE_PROVIDER. Both share one
+# response cache, so repeated requests (re-uploads, retries) skip the remote call.
+LLAMA_MODEL = f"meta-llama/Llama-3.3-70B-Instruct:{os.getenv('HUGGINGFACE_PROVIDER', 'sambanova')}"
+OPENAI_MODEL = "gpt-4o-mini"
+llm_cache = response_cache_from_env()
+hf_client = LLMClient.from_env("huggingface", "HUGGINGFACE", "https://router.huggingface.co/v1", "HUGGINGFACE_API_KEY", cache=llm_cache)
+openai_client = LLMClient.from_env("openai", "OPENAI", "https://api.openai.com/v1", "OPENAI_API_KEY", cache=llm_cache)
+
+# Shared, pooled Trello client for action item cards
+trello_client = TrelloClient.from_env()
+
+# Runs independent LLM calls for the same transcript concurrently
+llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_STAGE_WORKERS", "4")), thread_name_prefix="llm")
+
+# Batching: rough per-chunk working set for whisper-small on CPU, used to size
+# batches automatically when WHISPER_BATCH_SIZE is not set.
+BATCH_MEMORY_PER_CHUNK = 256 * 1024 * 1024
+MAX_AUTO_BATCH_SIZE = 16
+DEFAULT_BATCH_SIZE = 4
+
+def _available_memory_bytes():
     """
-    Transcribe audio to text using Whisper in chunks.
-    If the audio is not in English, it will be translated to English.
+    Best-effort estimate of free physical memory, or None if it can't be read.
     """
     try:
-        # Load audio
-        audio, sr = librosa.load(audio_file_path, sr=16000)
-        print(f"Audio length: {len(audio)/sr:.2f} seconds")
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
 
-        # Calculate step size and chunk size in samples
-        step_samples = int((chunk_size - overlap) * sr)
-        chunk_samples = int(chunk_size * sr)
+def resolve_batch_size(batch_size=None, num_beams=1):
+    """
+    Resolve the number of chunks decoded per generate call.
+    An explicit value wins, then WHISPER_BATCH_SIZE, then an estimate from free memory,
+    which allows for every beam of a beam search.
+    """
+    if batch_size is None:
+        batch_size = os.getenv("WHISPER_BATCH_SIZE", "auto")
+    if str(batch_size).strip().lower() != "auto":
+        return max(1, int(batch_size))
+
+    available = _available_memory_bytes()
+    if available is None:
+        return DEFAULT_BATCH_SIZE
+    # Only plan on using half of what is free right now
+    return max(1, min(MAX_AUTO_BATCH_SIZE, int(available // 2 // (BATCH_MEMORY_PER_CHUNK * num_beams))))
+
+def decode_chunks(chunks, sr=16000, batch_size=1, task="translate", decode_profile=None):
+    """
+    Yield one transcript per audio chunk, in order.
+    Chunks are decoded `batch_size` at a time with a single generate call per batch,
+    with the model and decoding strategy of `decode_profile` (default DECODE_PROFILE).
+    With the shared inference service, batches may also be merged with other requests.
+    """
+    import torch
+
+    _, profile = get_decode_profile(decode_profile)
+    kwargs = generate_kwargs(profile)
+    processor, whisper_model, _, runtime_profile, whisper_service = whisper_models.get(profile["model"]).get()
+    chunks = iter(chunks)
+    while True:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            break
+
+        if whisper_service:
+            with span("feature_extraction", chunks=len(batch)):
+                input_features = processor(batch, sampling_rate=sr, return_tensors="np").input_features
+            with span("generate", chunks=len(batch), service=True):
+                transcripts = whisper_service.generate(list(input_features), task=task, **kwargs)
+            yield from transcripts
+            continue
+
+        # Whisper pads every chunk to 30s, so a batch needs no extra padding
+        with span("feature_extraction", chunks=len(batch)):
+            input_features = processor(batch, sampling_rate=sr, return_tensors="pt").input_features
+            input_features = input_features.to(device)
 
-        transcripts = []
+        # Create attention mask
+        attention_mask = torch.ones_like(input_features)
 
-        # Process audio in chunks
-        for i in range(0, len(audio), step_samples):
-            chunk = audio[i:i + chunk_samples]
-            if len(chunk) < 0.5 * chunk_samples:  # Skip very small chunks
-                break
+        # Generate transcriptions for the whole batch
+        with span("generate", chunks=len(batch)), grad_context(runtime_profile):
+            predicted_ids = whisper_model.generate(
+                input_features,
+                attention_mask=attention_mask,
+                task=task,
+                **kwargs,
+            )
+        TOKENS_GENERATED.inc(int((predicted_ids != processor.tokenizer.pad_token_id).sum()))
 
-            # Process the chunk
-            input_features = processor(chunk, sampling_rate=sr, return_tensors="pt").input_features
-            input_features = input_features.to(device)
+        for transcript in processor.batch_decode(predicted_ids, skip_special_tokens=True):
+            yield transcript
 
-            # Create attention mask
-            attention_mask = torch.ones_like(input_features)
+def warm_up_decode_profiles(names):
+    """
+    Load and warm up the models the given decode profiles use, or with TRANSCRIBE_WORKERS
+    above one their worker pools, so a job switched to one of them doesn't pay for it.
+    """
+    workers, threads_per_worker = resolve_pool_size()
+    for model_name in dict.fromkeys(get_decode_profile(name)[1]["model"] for name in names):
+        model = whisper_models.get(model_name)
+        if workers > 1 and not model.service_address:
+            get_transcription_pool(model_name, workers, threads_per_worker, model.profile_name, device).warm_up()
+        else:
+            model.warm_up()
+        print(f"Warmed up {model_name}")
+
+def iter_transcription_windows(audio, streaming, segmentation, chunk_size, overlap):
+    """
+    Yield (window_audio, (start_sample, end_sample)) for each window to decode from a
+    PCM array, or a path when streaming. The span is where the window lies in the recording.
+    "vad" packs detected speech into windows of up to 30s with no overlap;
+    "fixed" uses `chunk_size` second windows overlapping by `overlap` seconds.
+    """
+    if segmentation == "vad":
+        blocks = iter_pcm_blocks(audio) if streaming else iter_array_blocks(audio)
+        for window in iter_speech_windows(blocks, SAMPLE_RATE):
+            yield window.audio, (window.spans[0][0], window.spans[-1][1])
+        return
+    if streaming:
+        windows = iter_audio_windows(iter_pcm_blocks(audio), SAMPLE_RATE, chunk_size, overlap)
+    else:
+        windows = split_audio_into_chunks(audio, SAMPLE_RATE, chunk_size, overlap)
+    step_samples = int((chunk_size - overlap) * SAMPLE_RATE)
+    for index, window in enumerate(windows):
+        yield window, (index * step_samples, index * step_samples + len(window))
+
+def chunk_segments(transcripts, offsets=None):
+    """
+    Timed transcript segments: one {"text", "start_ms", "end_ms"} per decoded chunk.
+    Without `offsets` the times are None, but every chunk's text is kept.
+    """
+    if not offsets:
+        return [{"text": text, "start_ms": None, "end_ms": None} for text in transcripts]
+    return [
+        {"text": text, "start_ms": round(start * 1000 / SAMPLE_RATE), "end_ms": round(end * 1000 / SAMPLE_RATE)}
+        for text, (start, end) in zip(transcripts, offsets)
+    ]
+
+def transcribe_audio(audio, chunk_size=20, overlap=5, batch_size=None, on_chunk=None, use_cache=True, streaming=None,
+                     segmentation=None, workers=None, threads_per_worker=None, return_segments=False,
+                     decode_profile=None, choose_profile=None):
+    """
+    Transcribe audio to text using Whisper in chunks.
+    `audio` is a 16 kHz mono float32 array or a path to any file ffmpeg can decode.
+    If the audio is not in English, it will be translated to English.
+    `batch_size` chunks are decoded together; None sizes batches automatically.
+    `on_chunk(index, total, text)` is called as each chunk's transcript is ready; a
+    JobCancelled it raises stops transcription and is passed on to the caller.
+    Results are cached by audio content and decode parameters unless `use_cache` is False.
+    With `streaming` (default TRANSCRIBE_STREAMING, on), a path is decoded block by
+    block so memory use stays flat however long the recording is.
+    `segmentation` (default TRANSCRIBE_SEGMENTATION, "vad") picks how audio is cut into
+    chunks; with "vad", `chunk_size` and `overlap` are unused and the chunk total passed
+    to `on_chunk` is an upper bound.
+    With `workers` (default TRANSCRIBE_WORKERS, 1) above one, batches are decoded in a pool
+    of worker processes with `threads_per_worker` torch threads each
+    (default TRANSCRIBE_THREADS_PER_WORKER, or the CPUs split evenly).
+    With `return_segments`, returns (transcript, segments) where segments are the
+    chunk transcripts with their offsets in the recording (see chunk_segments).
+    `decode_profile` (default DECODE_PROFILE, "balanced") picks the model size and
+    decoding strategy: "fast", "balanced" or "accurate".
+    `choose_profile(name)`, if given, is called when no transcript is cached for
+    `decode_profile` and returns the profile to decode with instead, e.g. a faster one.
+    """
+    task = "translate"
+    decode_profile, profile = get_decode_profile(decode_profile)
+    model_whisper = whisper_models.get(profile["model"])
+    sr = SAMPLE_RATE
+    segmentation = (segmentation or os.getenv("TRANSCRIBE_SEGMENTATION", "vad")).lower()
+    if segmentation not in ("vad", "fixed"):
+        raise ValueError(f"Unknown segmentation '{segmentation}', expected 'vad' or 'fixed'")
+    if segmentation == "vad":
+        chunk_size, overlap = MAX_WINDOW_SECONDS, 0
+    if streaming is None:
+        streaming = os.getenv("TRANSCRIBE_STREAMING", "true").lower() == "true"
+    streaming = streaming and not isinstance(audio, np.ndarray)
+    try:
+        # Load audio, or in streaming mode make a first pass that only hashes and measures it
+        if streaming:
+            audio_hash, n_samples = hash_pcm_stream(audio)
+        else:
+            if not isinstance(audio, np.ndarray):
+                audio = decode_audio(audio)
+            audio_hash, n_samples = audio_content_hash(audio), len(audio)
+        print(f"Audio length: {n_samples/sr:.2f} seconds")
+
+        def profile_cache_key():
+            # Greedy decodes keep the key format they had before decode profiles
+            model_key = f"{model_whisper.model_name}:{model_whisper.profile_name}"
+            if profile["num_beams"] > 1:
+                model_key += f":beams={profile['num_beams']}"
+            return transcript_cache_key(audio_hash, model_key, segmentation, chunk_size, overlap, task)
+
+        def cached_transcript():
+            cached = transcript_cache.get(cache_key)
+            if not cached:
+                return None
+            print(f"Transcript cache hit for {cache_key[:12]}")
+            if on_chunk:
+                for index, transcript in enumerate(cached["chunks"]):
+                    on_chunk(index, len(cached["chunks"]), transcript)
+            if return_segments:
+                # Entries cached before offsets were recorded get untimed segments
+                return cached["transcript"], chunk_segments(cached["chunks"], cached.get("offsets"))
+            return cached["transcript"]
+
+        cache_key = None
+        if use_cache:
+            cache_key = profile_cache_key()
+            cached = cached_transcript()
+            if cached:
+                return cached
+
+        if choose_profile:
+            chosen, chosen_profile = get_decode_profile(choose_profile(decode_profile))
+            if chosen != decode_profile:
+                decode_profile, profile = chosen, chosen_profile
+                model_whisper = whisper_models.get(profile["model"])
+                if use_cache:
+                    cache_key = profile_cache_key()
+                    cached = cached_transcript()
+                    if cached:
+                        return cached
+
+        batch_size = resolve_batch_size(batch_size, profile["num_beams"])
+        print(
+            f"Decoding with the {decode_profile} profile, batch size {batch_size}, "
+            f"{segmentation} segmentation{' (streaming)' if streaming else ''}"
+        )
 
-            # Generate transcription for the chunk
-            with torch.no_grad():
-                predicted_ids = whisper_model.generate(
-                    input_features,
-                    attention_mask=attention_mask,
-                    max_length=448,
-                    task="translate",  # Translate to English
-                )
+        decode = decode_chunks
+        workers, threads_per_worker = resolve_pool_size(workers, threads_per_worker)
+        if workers > 1 and model_whisper.service_address:
+            print("Ignoring TRANSCRIBE_WORKERS: decoding goes to the shared Whisper service")
+        elif workers > 1:
+            print(f"Decoding in {workers} worker processes with {threads_per_worker} threads each")
+            decode = get_transcription_pool(
+                profile["model"], workers, threads_per_worker, model_whisper.profile_name, device
+            ).decode_chunks
+
+        offsets = []
+
+        def windows():
+            for window, offset in iter_transcription_windows(audio, streaming, segmentation, chunk_size, overlap):
+                offsets.append(offset)
+                yield window
+
+        chunks = windows()
+        if segmentation == "vad":
+            # Speech can't need more windows than back-to-back full ones
+            total = max(1, -(-n_samples // int(MAX_WINDOW_SECONDS * sr)))
+        else:
+            total = count_chunks(n_samples, sr, chunk_size, overlap)
 
-            # Decode transcription for the chunk
-            transcript = processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+        transcripts = []
+        for index, transcript in enumerate(
+            decode(chunks, sr, batch_size=batch_size, task=task, decode_profile=decode_profile)
+        ):
             transcripts.append(transcript)
+            CHUNKS_DECODED.inc()
+            total = max(total, index + 1)
+            if on_chunk:
+                on_chunk(index, total, transcript)
+
+        AUDIO_SECONDS.inc(n_samples / sr)
 
         # Combine all transcripts into a single string
         full_transcript = " ".join(transcripts)
         print(f"Full transcript length: {len(full_transcript)} characters, {len(full_transcript.split())} words")
+        if cache_key and full_transcript:
+            transcript_cache.put(cache_key, {"transcript": full_transcript, "chunks": transcripts, "offsets": offsets})
+        if return_segments:
+            return full_transcript, chunk_segments(transcripts, offsets)
         return full_transcript
 
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"Error in transcribe_audio: {str(e)}")
-        return ""
+        return ("", []) if return_segments else ""
 
-def summarize_with_llama(text, custom_prompt=None):
+def summarize_with_llama(text, custom_prompt=None, use_cache=True):
     """
     Summarize text using Llama-3.3-70B-Instruct hosted on Hugging Face via OpenAI API.
     """
@@ -104,16 +354,14 @@ def summarize_with_llama(text, custom_prompt=None):
             {"role": "user", "content": prompt}
         ]
 
-        # Call the hosted Llama-3.3-70B-Instruct model via OpenAI API
-        completion = client.chat.completions.create(
-            model="meta-llama/Llama-3.3-70B-Instruct",  # Updated model name
-            messages=messages,
+        # Call the hosted Llama-3.3-70B-Instruct model
+        summary = hf_client.chat(
+            LLAMA_MODEL,
+            messages,
             max_tokens=500,  # Adjust based on desired summary length
             temperature=0.7,  # Control creativity
+            use_cache=use_cache,
         )
-
-        # Extract the summary from the response
-        summary = completion.choices[0].message.content
         print(f"Generated summary length: {len(summary)} characters")
         return summary
 
@@ -121,7 +369,7 @@ def summarize_with_llama(text, custom_prompt=None):
         print(f"Error in summarize_with_llama: {str(e)}")
         return ""
 
-def extract_detailed_action_items(text):
+def extract_detailed_action_items(text, use_cache=True):
     """
     Extract action items using Llama-3.3-70B-Instruct hosted on Hugging Face via OpenAI API.
     """
@@ -147,17 +395,15 @@ def extract_detailed_action_items(text):
             {"role": "user", "content": prompt}
         ]
 
-        # Call the hosted Llama-3.3-70B-Instruct model via OpenAI API
-        completion = client.chat.completions.create(
-            model="meta-llama/Llama-3.3-70B-Instruct",  # Updated model name
-            messages=messages,
+        # Call the hosted Llama-3.3-70B-Instruct model
+        action_items_text = hf_client.chat(
+            LLAMA_MODEL,
+            messages,
             max_tokens=300,  # Adjust based on desired output length
             temperature=0.7,  # Control creativity
+            use_cache=use_cache,
         )
 
-        # Extract the action items from the response
-        action_items_text = completion.choices[0].message.content
-
         # Parse the action items into a list of dictionaries
         action_items = []
         for block in action_items_text.split("\n\n"):  # Split by paragraphs
@@ -199,76 +445,244 @@ def extract_detailed_action_items(text):
             "deadline": "Not specified"
         }]
 
-def generate_local_summary(text, custom_prompt=None):
+def generate_local_summary(text, custom_prompt=None, use_cache=True):
     """
     Generate a summary using Llama-3.3-70B-Instruct.
+    The summary and action item requests are independent, so they run concurrently.
     """
-    summary = summarize_with_llama(text, custom_prompt)
-    action_items = extract_detailed_action_items(text)
+    summary_future = llm_executor.submit(bind_context(summarize_with_llama), text, custom_prompt, use_cache)
+    action_items_future = llm_executor.submit(bind_context(extract_detailed_action_items), text, use_cache)
+    summary = summary_future.result()
+    action_items = action_items_future.result()
     return {
         "summary": summary or "No significant summary could be generated.",
         "action_items": action_items or [{"task": "No specific action items identified.", "assignee": "Unassigned", "deadline": "Not specified"}]
     }
 
-def summarize_and_extract_action_items(text, use_openai=False, custom_prompt=None):
+def summarize_with_openai(text, custom_prompt=None, use_cache=True):
+    """
+    Summarize and extract action items with GPT-4o-mini in a single call.
+    Raises if the API call fails so callers can fall back to the local model.
+    """
+    # Use custom prompt if provided, otherwise use default
+    if not custom_prompt or custom_prompt.strip() == "":
+        summary_instruction = "A concise, professional summary of the transcript and list out the key discussion points."
+    else:
+        summary_instruction = custom_prompt
+
+    output = openai_client.chat(
+        OPENAI_MODEL,
+        [
+            {
+                "role": "system", 
+                "content": "You are an expert meeting summarizer. Provide a comprehensive summary and identify clear action items."
+            },
+            {
+                "role": "user", 
+                "content": f"""
+                Analyze the following meeting transcript:
+
+                {text}
+
+                Please provide:
+                1. {summary_instruction}
+                2. Specific, actionable items with potential assignees and deadlines. Note that you are supposed to give at least one action item minimum.
+
+                Format:
+                **Summary:**
+                [Concise overview of the meeting along with key takeaways]
+
+                **Action Items:**
+                - Task: [Specific action]
+                - Assignee: [Who should do it]
+                - Deadline: [Suggested timeline]
+                """
+            }
+        ],
+        temperature=0.3,
+        max_tokens=500,
+        use_cache=use_cache,
+    )
+    return parse_openai_output(output)
+
+# Map-reduce summarization: transcripts estimated above MAP_REDUCE_THRESHOLD_TOKENS are
+# split into sections of about MAP_REDUCE_SECTION_TOKENS, summarized in parallel, then merged
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "6000"))
+MAP_REDUCE_SECTION_TOKENS = int(os.getenv("MAP_REDUCE_SECTION_TOKENS", "3000"))
+SECTION_SUMMARY_PROMPT = """
+Summarize this section of a longer meeting transcript. Keep every key discussion point,
+decision and conclusion, including names and dates, as concise bullet points.
+"""
+# Placeholder items the extractors return when they find nothing
+PLACEHOLDER_TASKS = (
+    "No specific action items identified.",
+    "Review the meeting transcript and identify specific action items.",
+    "Error extracting action items.",
+    "Parsing error",
+)
+
+@functools.lru_cache(maxsize=1)
+def _load_tokenizer():
+    return load_processor(WHISPER_MODEL_NAME).tokenizer
+
+def whisper_tokenizer():
+    """
+    The Whisper tokenizer, without loading the model just for it: the loaded
+    model's own if there is one, otherwise the tokenizer alone, loaded once.
+    """
+    if whisper.loaded:
+        return whisper.get().processor.tokenizer
+    return _load_tokenizer()
+
+def count_tokens(text):
+    """
+    Estimate the token count of `text` with the Whisper (GPT-2 BPE) tokenizer,
+    which is close to the Llama and GPT tokenizers for English.
+    """
+    return len(whisper_tokenizer().encode(text, add_special_tokens=False))
+
+def split_transcript_sections(text, max_tokens=MAP_REDUCE_SECTION_TOKENS):
+    """
+    Split a transcript into sections of at most about `max_tokens` tokens, on sentence boundaries.
+    """
+    sections = []
+    current = []
+    current_tokens = 0
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        tokens = count_tokens(sentence)
+        if tokens > max_tokens:
+            # A run-on "sentence" (Whisper output can lack punctuation): split by words
+            words = sentence.split()
+            step = max(1, len(words) * max_tokens // tokens)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                sections.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        sections.append(" ".join(current))
+    return sections
+
+def _summarize_section(section, use_openai, use_cache=True):
+    """
+    Map step: summary and action items for one section.
+    Runs on llm_executor, so it calls the LLM helpers directly rather than submitting more work.
+    """
+    if use_openai:
+        try:
+            return summarize_with_openai(section, SECTION_SUMMARY_PROMPT, use_cache)
+        except Exception as e:
+            print(f"OpenAI API call failed for section: {str(e)}")
+    return {
+        "summary": summarize_with_llama(section, SECTION_SUMMARY_PROMPT, use_cache),
+        "action_items": extract_detailed_action_items(section, use_cache),
+    }
+
+def _normalize_task(task):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", task.lower())).strip()
+
+def merge_action_items(action_item_lists):
+    """
+    Reduce step for action items: concatenate in order, dropping placeholders and
+    near-duplicate tasks. A duplicate fills in an assignee or deadline the kept item lacks.
+    """
+    merged = []
+    for item in (item for items in action_item_lists for item in items):
+        if not isinstance(item, dict) or not item.get("task") or item["task"] in PLACEHOLDER_TASKS:
+            continue
+        normalized = _normalize_task(item["task"])
+        for kept in merged:
+            if SequenceMatcher(None, normalized, _normalize_task(kept["task"])).ratio() >= 0.85:
+                if kept.get("assignee") in ("Unassigned", "N/A", "") and item.get("assignee"):
+                    kept["assignee"] = item["assignee"]
+                if kept.get("deadline") in ("Not specified", "N/A", "") and item.get("deadline"):
+                    kept["deadline"] = item["deadline"]
+                break
+        else:
+            merged.append(dict(item))
+    return merged
+
+def _reduce_summaries(section_summaries, use_openai, custom_prompt=None, use_cache=True):
+    """
+    Reduce step for summaries: one call that merges the section summaries,
+    applying the user's prompt to the whole meeting.
+    """
+    if not custom_prompt or custom_prompt.strip() == "":
+        custom_prompt = "Summarize the meeting in a concise and professional manner. Focus on the key discussion points, decisions, and conclusions. Do not include action items."
+    sections_text = "\n\n".join(f"Section {i + 1}:\n{summary}" for i, summary in enumerate(section_summaries))
+    messages = [
+        {
+            "role": "user",
+            "content": f"""
+            {custom_prompt}
+
+            The meeting was too long to read in one pass. Below are summaries of its consecutive
+            sections, in order. Merge them into one summary of the whole meeting, removing repetition.
+
+            Section summaries:
+            {sections_text}
+            """
+        }
+    ]
     try:
         if use_openai:
-            # Ensure OpenAI API key is set
-            if not os.getenv("OPENAI_API_KEY"):
-                print("OpenAI API key is not set. Falling back to local model.")
-                return generate_local_summary(text, custom_prompt)
-            
+            return openai_client.chat(OPENAI_MODEL, messages, max_tokens=800, temperature=0.3, use_cache=use_cache)
+        return hf_client.chat(LLAMA_MODEL, messages, max_tokens=800, temperature=0.7, use_cache=use_cache)
+    except Exception as e:
+        print(f"Error merging section summaries: {str(e)}")
+        return "\n\n".join(section_summaries)
+
+def map_reduce_summary(text, use_openai=False, custom_prompt=None, use_cache=True):
+    """
+    Hierarchical summarization for transcripts too long for a single prompt:
+    summarize token-budgeted sections in parallel, then merge the summaries and action items.
+    """
+    sections = split_transcript_sections(text)
+    print(f"Map-reduce summarization over {len(sections)} sections")
+    summarize_section = bind_context(lambda section: _summarize_section(section, use_openai, use_cache))
+    section_results = list(llm_executor.map(summarize_section, sections))
+
+    summaries = [result["summary"] for result in section_results if result.get("summary")]
+    summary = _reduce_summaries(summaries, use_openai, custom_prompt, use_cache) if summaries else ""
+    action_items = merge_action_items(result.get("action_items", []) for result in section_results)
+    return {
+        "summary": summary or "No significant summary could be generated.",
+        "action_items": action_items or [{"task": "No specific action items identified.", "assignee": "Unassigned", "deadline": "Not specified"}]
+    }
+
+def summarize_and_extract_action_items(text, use_openai=False, custom_prompt=None, use_cache=True):
+    """
+    Summary and action items for a transcript. LLM responses are served from the
+    response cache when the same request was made before, unless `use_cache` is False.
+    """
+    try:
+        # Ensure OpenAI API key is set
+        if use_openai and not os.getenv("OPENAI_API_KEY"):
+            print("OpenAI API key is not set. Falling back to local model.")
+            use_openai = False
+
+        # Long transcripts don't fit one prompt well; summarize them section by section
+        tokens = count_tokens(text)
+        if tokens > MAP_REDUCE_THRESHOLD_TOKENS:
+            print(f"Transcript is about {tokens} tokens, using map-reduce summarization.")
+            return map_reduce_summary(text, use_openai, custom_prompt, use_cache)
+
+        if use_openai:
             print("Using OpenAI for summarization and action item extraction.")  # Log OpenAI usage
             try:
-                openai.api_key = os.getenv("OPENAI_API_KEY")
-                
-                # Use custom prompt if provided, otherwise use default
-                if not custom_prompt or custom_prompt.strip() == "":
-                    summary_instruction = "A concise, professional summary of the transcript and list out the key discussion points."
-                else:
-                    summary_instruction = custom_prompt
-                
-                response = openai.ChatCompletion.create(
-                    model="gpt-4o-mini",  # Ensure the correct model name is used
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert meeting summarizer. Provide a comprehensive summary and identify clear action items."
-                        },
-                        {
-                            "role": "user", 
-                            "content": f"""
-                            Analyze the following meeting transcript:
-
-                            {text}
-
-                            Please provide:
-                            1. {summary_instruction}
-                            2. Specific, actionable items with potential assignees and deadlines. Note that you are supposed to give at least one action item minimum.
-
-                            Format:
-                            **Summary:**
-                            [Concise overview of the meeting along with key takeaways]
-
-                            **Action Items:**
-                            - Task: [Specific action]
-                            - Assignee: [Who should do it]
-                            - Deadline: [Suggested timeline]
-                            """
-                        }
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
-                )
-                output = response.choices[0].message.content
-                return parse_openai_output(output)
+                return summarize_with_openai(text, custom_prompt, use_cache)
             except Exception as e:
                 print(f"OpenAI API call failed: {str(e)}")
-                return generate_local_summary(text, custom_prompt)
+                return generate_local_summary(text, custom_prompt, use_cache)
         
         # Local method if OpenAI is not used
         print("Using local model for summarization and action item extraction.")  # Log local model usage
-        return generate_local_summary(text, custom_prompt)
+        return generate_local_summary(text, custom_prompt, use_cache)
     
     except Exception as e:
         return {
@@ -302,18 +716,12 @@ def parse_openai_output(output):
             "action_items": [{"task": "Parsing error", "assignee": "N/A", "deadline": "N/A"}]
         }
 
-def create_trello_task(task_name, assignee, deadline):
+def create_trello_tasks(action_items):
+    """
+    Create a Trello card per action item, concurrently, skipping items already on the list.
+    Returns one response per item, in order.
+    """
     try:
-        url = "https://api.trello.com/1/cards"
-        query = {
-            "key": os.getenv("TRELLO_API_KEY"),
-            "token": os.getenv("TRELLO_TOKEN"),
-            "idList": os.getenv("TRELLO_ID_LIST"),
-            "name": task_name,
-            "desc": f"Assignee: {assignee}\nDeadline: {deadline}"
-        }
-        response = requests.post(url, params=query)
-        response.raise_for_status()
-        return response.json()
+        return trello_client.create_tasks(action_items)
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return [{"error": str(e)} for _ in action_items]
@@ -0,0 +1,276 @@
+import os
+import threading
+from collections import namedtuple
+
+# torch and transformers are imported inside the functions that need them, so
+# importing this module (and the web apps) stays fast until a model is needed.
+
+# Runtime profiles for the Whisper model. Select one with WHISPER_PROFILE.
+#   memory:         the original setup, KV cache off and gradient checkpointing on
+#   inference:      KV cache on, run under torch.inference_mode
+#   inference-int8: as inference, with int8 dynamic quantization of the Linear layers
+RUNTIME_PROFILES = {
+    "memory": {
+        "use_cache": False,
+        "gradient_checkpointing": True,
+        "inference_mode": False,
+        "quantize": False,
+    },
+    "inference": {
+        "use_cache": True,
+        "gradient_checkpointing": False,
+        "inference_mode": True,
+        "quantize": False,
+    },
+    "inference-int8": {
+        "use_cache": True,
+        "gradient_checkpointing": False,
+        "inference_mode": True,
+        "quantize": True,
+    },
+}
+DEFAULT_PROFILE = "inference"
+
+# Decode profiles trade accuracy for speed per request: which Whisper model decodes
+# and how. Select one per upload, or the default with DECODE_PROFILE. Ordered from
+# fastest to most accurate, which is the order jobs fall back along when busy.
+#   fast:     whisper-base, greedy
+#   balanced: whisper-small, greedy (the original setup)
+#   accurate: whisper-small, beam search
+DECODE_PROFILES = {
+    "fast": {"model": "openai/whisper-base", "num_beams": 1},
+    "balanced": {"model": "openai/whisper-small", "num_beams": 1},
+    "accurate": {"model": "openai/whisper-small", "num_beams": 5},
+}
+DEFAULT_DECODE_PROFILE = "balanced"
+WHISPER_MAX_LENGTH = 448
+
+
+def get_runtime_profile(name=None):
+    """
+    Look up a runtime profile by name, falling back to WHISPER_PROFILE and then the default.
+    """
+    name = (name or os.getenv("WHISPER_PROFILE") or DEFAULT_PROFILE).strip().lower()
+    if name not in RUNTIME_PROFILES:
+        raise ValueError(f"Unknown Whisper profile '{name}'. Choose from: {', '.join(RUNTIME_PROFILES)}")
+    return name, RUNTIME_PROFILES[name]
+
+
+def get_decode_profile(name=None):
+    """
+    Look up a decode profile by name, falling back to DECODE_PROFILE and then the default.
+    """
+    name = (name or os.getenv("DECODE_PROFILE") or DEFAULT_DECODE_PROFILE).strip().lower()
+    if name not in DECODE_PROFILES:
+        raise ValueError(f"Unknown decode profile '{name}'. Choose from: {', '.join(DECODE_PROFILES)}")
+    return name, DECODE_PROFILES[name]
+
+
+def faster_decode_profile(name, steps=1):
+    """
+    The profile `steps` places faster than `name`, stopping at the fastest.
+    """
+    names = list(DECODE_PROFILES)
+    return names[max(0, names.index(name) - steps)]
+
+
+def generate_kwargs(decode_profile):
+    """
+    Keyword arguments for model.generate under a decode profile.
+    """
+    kwargs = {"max_length": WHISPER_MAX_LENGTH}
+    if decode_profile["num_beams"] > 1:
+        kwargs["num_beams"] = decode_profile["num_beams"]
+    return kwargs
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Apply torch thread settings from the arguments or WHISPER_INTRA_OP_THREADS / WHISPER_INTER_OP_THREADS.
+    Returns the thread counts torch ends up using.
+    """
+    import torch
+
+    intra_op = intra_op or os.getenv("WHISPER_INTRA_OP_THREADS")
+    inter_op = inter_op or os.getenv("WHISPER_INTER_OP_THREADS")
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op parallel work has started
+            print(f"Could not set inter-op threads: {str(e)}")
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+def apply_runtime_profile(model, profile):
+    """
+    Configure a loaded Whisper model according to a runtime profile and return it.
+    """
+    import torch
+
+    model.config.use_cache = profile["use_cache"]
+    if profile["gradient_checkpointing"]:
+        model.gradient_checkpointing_enable()
+    else:
+        model.eval()
+    if profile["quantize"]:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def grad_context(profile):
+    """
+    Autograd context to run generate under for the given profile.
+    """
+    import torch
+
+    return torch.inference_mode() if profile["inference_mode"] else torch.no_grad()
+
+
+def load_whisper(model_name="openai/whisper-small", profile_name=None, device="cpu"):
+    """
+    Load the Whisper processor and model configured for the selected runtime profile.
+    Returns (processor, model, profile_name, profile).
+    """
+    from transformers import WhisperProcessor, WhisperForConditionalGeneration
+
+    profile_name, profile = get_runtime_profile(profile_name)
+    intra_op, inter_op = configure_threads()
+
+    processor = WhisperProcessor.from_pretrained(model_name)
+    model = WhisperForConditionalGeneration.from_pretrained(model_name).to(device)
+    model = apply_runtime_profile(model, profile)
+
+    print(
+        f"Whisper runtime profile: {profile_name} "
+        f"(kv_cache={profile['use_cache']}, int8={profile['quantize']}, "
+        f"intra_op_threads={intra_op}, inter_op_threads={inter_op})"
+    )
+    return processor, model, profile_name, profile
+
+
+def load_processor(model_name="openai/whisper-small"):
+    """
+    Load only the feature extractor and tokenizer, for processes that send decoding
+    to the shared inference service instead of holding the model themselves.
+    """
+    from transformers import WhisperProcessor
+
+    return WhisperProcessor.from_pretrained(model_name)
+
+
+# What LazyWhisper loads: `model` is None and `service` is set when decoding
+# goes to the shared inference service
+WhisperState = namedtuple("WhisperState", ["processor", "model", "profile_name", "profile", "service"])
+
+
+class LazyWhisper:
+    """
+    Loads the Whisper processor and model on first use, exactly once, from any thread.
+    With `service_address`, only the processor is loaded and decoding goes to the
+    shared inference service. `warm_up()` also runs a dummy decode to prime kernels.
+    """
+
+    def __init__(self, model_name="openai/whisper-small", device="cpu", service_address=None):
+        self.model_name = model_name
+        self.device = device
+        self.service_address = service_address
+        self.warm = False
+        self.error = None
+        self._state = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    @property
+    def profile_name(self):
+        """
+        The runtime profile in use, without loading anything.
+        """
+        return get_runtime_profile()[0]
+
+    def get(self):
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    self._state = self._load()
+        return self._state
+
+    def _load(self):
+        if self.service_address:
+            from inference_service import WhisperServiceClient
+
+            profile_name, profile = get_runtime_profile()
+            print(f"Using Whisper service at {self.service_address}")
+            return WhisperState(
+                load_processor(self.model_name), None, profile_name, profile,
+                WhisperServiceClient(self.service_address),
+            )
+        processor, model, profile_name, profile = load_whisper(self.model_name, device=self.device)
+        return WhisperState(processor, model, profile_name, profile, None)
+
+    def warm_up(self):
+        """
+        Load everything and run one short decode so the first real request
+        doesn't pay for lazy initialization inside torch.
+        """
+        import numpy as np
+
+        state = self.get()
+        silence = np.zeros(16000, dtype=np.float32)
+        if state.service:
+            state.service.ping()
+        else:
+            import torch
+
+            input_features = state.processor(silence, sampling_rate=16000, return_tensors="pt").input_features
+            with grad_context(state.profile):
+                state.model.generate(input_features, attention_mask=torch.ones_like(input_features), max_length=8)
+        self.warm = True
+
+    def start_warm_up(self):
+        """
+        Warm up on a background thread; failures are recorded in `error`.
+        """
+        def run():
+            try:
+                self.warm_up()
+                print("Whisper warm-up complete")
+            except Exception as e:
+                self.error = str(e)
+                print(f"Whisper warm-up failed: {str(e)}")
+
+        threading.Thread(target=run, name="whisper-warm-up", daemon=True).start()
+
+
+class WhisperModels:
+    """
+    One LazyWhisper per model name, so decode profiles that share a model share one
+    loaded copy. With `service_address`, every name maps to the shared inference
+    service's model, and only the decoding strategy differs between profiles.
+    """
+
+    def __init__(self, device="cpu", service_address=None):
+        self.device = device
+        self.service_address = service_address
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name):
+        with self._lock:
+            if self.service_address and self._models:
+                return next(iter(self._models.values()))
+            if model_name not in self._models:
+                self._models[model_name] = LazyWhisper(model_name, self.device, self.service_address)
+            return self._models[model_name]
+
+    def loaded(self):
+        """
+        Names of the models loaded so far.
+        """
+        with self._lock:
+            return [name for name, model in self._models.items() if model.loaded]
@@ -3,6 +3,7 @@ import "./App.css";
 
 function App() {
   const [selectedModel, setSelectedModel] = useState("openai");
+  const [decodeProfile, setDecodeProfile] = useState("balanced");
   const [transcript, setTranscript] = useState("");
   const [summary, setSummary] = useState("");
   const [actionItems, setActionItems] = useState([]);
@@ -19,6 +20,55 @@ function App() {
     }
   };
 
+  const waitForJobResult = async (jobId) => {
+    while (true) {
+      const response = await fetch(`http://localhost:5000/jobs/${jobId}/result`);
+      if (response.status === 200) {
+        return response.json();
+      }
+      if (response.status !== 202) {
+        const body = await response.json();
+        throw new Error(body.error || `HTTP error! Status: ${response.status}`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  };
+
+  // Show the transcript chunk by chunk and the summary as soon as they are ready,
+  // then resolve with the final result. Falls back to polling if the stream drops.
+  const followJobEvents = (jobId) =>
+    new Promise((resolve, reject) => {
+      const events = new EventSource(`http://localhost:5000/jobs/${jobId}/events`);
+      const chunks = [];
+      const close = () => events.close();
+      events.addEventListener("transcript", (event) => {
+        const chunk = JSON.parse(event.data);
+        chunks[chunk.index] = chunk.text;
+        setTranscript(chunks.filter(Boolean).join(" "));
+      });
+      events.addEventListener("summary", (event) => {
+        const summaryData = JSON.parse(event.data);
+        setSummary(summaryData.summary);
+        setActionItems(summaryData.action_items);
+      });
+      events.addEventListener("result", (event) => {
+        close();
+        resolve(JSON.parse(event.data));
+      });
+      events.addEventListener("error", (event) => {
+        close();
+        if (event.data) {
+          reject(new Error(JSON.parse(event.data).error));
+        } else {
+          waitForJobResult(jobId).then(resolve, reject);
+        }
+      });
+      events.addEventListener("cancelled", () => {
+        close();
+        reject(new Error("Job was cancelled"));
+      });
+    });
+
   const handleGenerateSummary = async () => {
     if (!selectedFile) {
       alert("Please select an audio or video file first.");
@@ -26,10 +76,14 @@ function App() {
     }
 
     setLoading(true);
+    setTranscript("");
+    setSummary("");
+    setActionItems([]);
     const formData = new FormData();
     formData.append("audio", selectedFile);
     formData.append("model", selectedModel);
     formData.append("customPrompt", customPrompt);
+    formData.append("decodeProfile", decodeProfile);
 
     try {
       const response = await fetch("http://localhost:5000/process_audio", {
@@ -41,7 +95,9 @@ function App() {
         throw new Error(`HTTP error! Status: ${response.status}`);
       }
       
-      const data = await response.json();
+      // The backend queues the upload as a job; follow its progress until it finishes
+      const job = await response.json();
+      const data = await followJobEvents(job.job_id);
       setTranscript(data.transcript);
       setSummary(data.summary_data.summary);
       setActionItems(data.summary_data.action_items);
@@ -89,6 +145,20 @@ function App() {
               <option value="local">Llama-3.3</option>
             </select>
           </div>
+
+          <div className="model-select-wrapper">
+            <label className="model-select-label">Transcription:</label>
+            <select
+              className="model-select"
+              value={decodeProfile}
+              onChange={(e) => setDecodeProfile(e.target.value)}
+              name="decodeProfile"
+            >
+              <option value="fast">Fast</option>
+              <option value="balanced">Balanced</option>
+              <option value="accurate">Accurate</option>
+            </select>
+          </div>
           
           <div className="file-upload-wrapper">
             <input